@@ -1,19 +1,59 @@
+import os
 from datetime import datetime
 import streamlit as st
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import shap
-from backend.core.data import load_dataset, split_dataset
 from backend.core.model import load_model, load_features
-from backend.core.simulation import get_random_packet, predict, simulate_window
+from backend.core.simulation import get_random_packet, predict, simulate_window, check_latency_slo
 from backend.core.evaluation import evaluate
-from backend.services.SHAP_explainer import create_explainer, generate_shap_analysis
+from backend.core import profiling
+from backend.core.archive import FlowArchive, query_archive
+from backend.core.cascade import model_fingerprint
+from backend.core.downsample import SEVERITY_CODES, TrendDownsampler
+from backend.core.engine import ScoringEngine
+from backend.core.dedup import dedup_predict_proba
+from backend.core.drift import DriftMonitor, load_reference, reference_statistics, save_reference
+from backend.core.hosts import HostTracker
+from backend.core.neighbors import FlowIndex, load_flow_index, save_flow_index
+from backend.core.overload import OverloadController
+from backend.core.registry import ModelRegistry, ModelWatcher
+from backend.core.sampling import SamplingIndex, constant_scenario, ramp_scenario
+from backend.core.store import open_flow_store
+from backend.services.explainer_pool import ExplainerPool
+from backend.services.incident_report import IncidentReporter
 
 # File paths
-MODEL_PATH   = "backend/model/rf_model.pkl"
+MODEL_PATH   = os.environ.get("NIDS_MODEL_PATH", "backend/model/rf_model.pkl")
 FEATURE_PATH = "backend/model/rf_features.pkl"
+# The bundled cascade wraps the bundled forest, so it is off when another model is served
+CASCADE_PATH = os.environ.get(
+    "NIDS_CASCADE_PATH", "" if "NIDS_MODEL_PATH" in os.environ else "backend/model/rf_cascade.pkl"
+)
+REGISTRY_DIR = os.environ.get("NIDS_MODEL_REGISTRY", "backend/model/registry")
+NEIGHBOR_INDEX_PATH = "backend/model/rf_neighbors.pkl"
+DRIFT_REFERENCE_PATH = "backend/model/rf_drift.pkl"
+DRIFT_FALLBACK_PATH = "backend/model/rf_drift_test.pkl"
 DATA_FILE    = "Friday-WorkingHours-Afternoon-DDos.pcap_ISCX.csv"
+FLOW_STORE_DIR = os.environ.get("NIDS_FLOW_STORE", os.path.splitext(DATA_FILE)[0] + "_store")
+REFERENCE_SAMPLE_ROWS = 50000
+METRICS_PORT = os.environ.get("NIDS_METRICS_PORT")
+METRICS_FILE = os.environ.get("NIDS_METRICS_FILE")
+METRICS_FILE_INTERVAL = float(os.environ.get("NIDS_METRICS_FILE_INTERVAL", "15"))
+# tracemalloc slows every traced stage down, so per-stage memory is opt-in
+PROFILE_MEMORY = os.environ.get("NIDS_PROFILE_MEMORY", "0") not in ("", "0")
+LATENCY_SLO_MS = float(os.environ.get("NIDS_LATENCY_SLO_MS", "250"))
+MONITOR_RATE   = float(os.environ.get("NIDS_MONITOR_RATE", "1.0"))
+ARCHIVE_DIR    = os.environ.get("NIDS_ARCHIVE_DIR")
+INCIDENT_DIR   = os.environ.get("NIDS_INCIDENT_DIR")
+EXPLAINER_WORKERS = int(os.environ.get("NIDS_EXPLAINER_WORKERS", "0")) or None
+MONITOR_REFRESH_SEC = 2.0
+THRESHOLD    = 0.6
+TREND_MAX_POINTS = 600
+ALERT_LOG_MAX  = 5000
+ALERT_LOG_ROWS = 200
+SEVERITY_PALETTE = np.array(["#63B3ED", "#68D391", "#F6AD55", "#FC8181"])
 
 st.set_page_config(
     page_title="AI-NIDS",
@@ -407,6 +447,20 @@ st.markdown(f"""
 # Session init
 if "alert_log" not in st.session_state:
     st.session_state["alert_log"] = []
+if "trend" not in st.session_state:
+    st.session_state["trend"] = TrendDownsampler(TREND_MAX_POINTS)
+
+def trim_alert_log():
+    # Every window is folded into the trend first, so KPIs and the chart keep
+    # the full history while the event log itself stays bounded
+    log, trend = st.session_state["alert_log"], st.session_state["trend"]
+    trend.extend_from_log(log)
+    excess = len(log) - ALERT_LOG_MAX
+    if excess > 0:
+        del log[:excess]
+        trend.log_trimmed(excess)
+
+trim_alert_log()
 
 last_severity = st.session_state.get("last_event", {}).get("severity", None)
 status_banner(last_severity)
@@ -414,12 +468,10 @@ status_banner(last_severity)
 # KPIs
 section_header("System Overview")
 
-total_events = len(st.session_state["alert_log"])
-high_alerts  = sum(1 for e in st.session_state["alert_log"] if e["severity"] == "HIGH")
-avg_risk     = (
-    round(sum(e["mean_risk_score"] for e in st.session_state["alert_log"]) / total_events, 2)
-    if total_events > 0 else 0.00
-)
+trend_history = st.session_state["trend"]
+total_events = trend_history.count
+high_alerts  = int(np.count_nonzero(trend_history.severity == SEVERITY_CODES["HIGH"]))
+avg_risk     = round(float(trend_history.risk.mean()), 2) if total_events > 0 else 0.00
 
 k1, k2, k3 = st.columns(3)
 k1.metric("Windows Analyzed", total_events)
@@ -428,10 +480,69 @@ k3.metric("Avg Risk Score", avg_risk)
 
 neon_divider()
 
-#Load resources
-model         = load_model(MODEL_PATH)
-feature_names = load_features(FEATURE_PATH)
-explainer     = create_explainer(model)
+#Metrics export
+@st.cache_resource
+def start_metrics_endpoint(port):
+    return profiling.start_metrics_server(port)
+
+@st.cache_resource
+def start_metrics_file(path):
+    return profiling.start_metrics_file_writer(path, METRICS_FILE_INTERVAL)
+
+if METRICS_PORT or METRICS_FILE or PROFILE_MEMORY:
+    profiling.enable(track_memory=PROFILE_MEMORY)
+if METRICS_PORT:
+    start_metrics_endpoint(int(METRICS_PORT))
+if METRICS_FILE:
+    start_metrics_file(METRICS_FILE)
+
+#Load resources (shared by every browser session in this process)
+def prepare_resources(model, feature_names, scoring_model):
+    explainer = None
+    if model and feature_names:
+        # Warm the scoring path and build the explainers before anyone uses them
+        scoring_model.predict_proba(pd.DataFrame(np.zeros((1, len(feature_names))), columns=feature_names))
+        explainer = ExplainerPool(model, size=EXPLAINER_WORKERS)
+    return model, feature_names, explainer, scoring_model
+
+def wraps_model(cascade, model):
+    # Cascades saved before fingerprints were recorded are never trusted
+    return getattr(cascade, "model_fingerprint", None) == model_fingerprint(model)
+
+@st.cache_resource
+def load_resources():
+    model = load_model(MODEL_PATH)
+    cascade = load_model(CASCADE_PATH) if CASCADE_PATH else None
+    if cascade is not None and not wraps_model(cascade, model):
+        st.warning(f"Ignoring {CASCADE_PATH}: it does not wrap the model loaded from {MODEL_PATH}")
+        cascade = None
+    return prepare_resources(model, load_features(FEATURE_PATH), cascade or model)
+
+@st.cache_resource
+def get_model_watcher():
+    # A registry with an active version takes over from the fixed model files
+    registry = ModelRegistry(REGISTRY_DIR)
+    if registry.active_version() is None:
+        return None
+    return ModelWatcher(
+        registry,
+        lambda loaded: prepare_resources(loaded.model, loaded.feature_names, loaded.scoring_model),
+        retire=lambda resources: resources[2].shutdown(wait=False),
+    ).start()
+
+@st.cache_resource
+def load_test_split(feature_names):
+    # Rows are read from the cleaned store on demand; only the labels are held in memory
+    return open_flow_store(DATA_FILE, FLOW_STORE_DIR, list(feature_names))
+
+model_watcher = get_model_watcher()
+if model_watcher is not None:
+    model, feature_names, explainer, scoring_model = model_watcher.current
+    if st.session_state.get("model_version") not in (None, model_watcher.version):
+        st.toast(f"Switched to model {model_watcher.version}")
+    st.session_state["model_version"] = model_watcher.version
+else:
+    model, feature_names, explainer, scoring_model = load_resources()
 
 if not model or not feature_names:
     st.markdown("""
@@ -443,14 +554,113 @@ if not model or not feature_names:
     """, unsafe_allow_html=True)
     st.stop()
 
-df = load_dataset(DATA_FILE)
-X_train, X_test, y_train, y_test = split_dataset(df, feature_names)
+flow_store = load_test_split(tuple(feature_names))
+X_test, y_test, hosts = flow_store.X_test, flow_store.y_test, flow_store.hosts
+
+def reference_rows(n_rows):
+    rng = np.random.default_rng(42)
+    return np.sort(rng.choice(n_rows, min(n_rows, REFERENCE_SAMPLE_ROWS), replace=False))
+
+@st.cache_resource
+def load_neighbor_index(_model, _X_test, _y_test):
+    index = load_flow_index(NEIGHBOR_INDEX_PATH)
+    if index is None or index.feature_names != list(_X_test.columns):
+        rows = reference_rows(len(_X_test))
+        X_sample = _X_test.iloc[rows]
+        risk = dedup_predict_proba(_model, X_sample)[:, 1]
+        index = FlowIndex(X_sample.columns, path=NEIGHBOR_INDEX_PATH).fit(X_sample, _y_test.iloc[rows], risk, refs=rows)
+        save_flow_index(index, NEIGHBOR_INDEX_PATH)
+    # Scored history is written back on every background rebuild
+    index.path = NEIGHBOR_INDEX_PATH
+    return index
+
+flow_index = load_neighbor_index(scoring_model, X_test, y_test)
+
+@st.cache_resource
+def load_drift_reference(feature_names, _X_test):
+    reference = load_reference(DRIFT_REFERENCE_PATH)
+    if reference is not None and reference["feature_names"] == list(feature_names):
+        return reference
+
+    # Older model directories have no training reference; the held-out split is
+    # the closest stand-in, kept apart so it is never mistaken for the real one
+    reference = load_reference(DRIFT_FALLBACK_PATH)
+    if reference is None or reference["feature_names"] != list(feature_names):
+        reference = reference_statistics(_X_test.iloc[reference_rows(len(_X_test))])
+        save_reference(reference, DRIFT_FALLBACK_PATH)
+    return reference
+
+drift_reference = load_drift_reference(tuple(feature_names), X_test)
+
+@st.cache_resource
+def load_flow_archive(root, feature_names):
+    return FlowArchive(root, feature_names)
+
+flow_archive = load_flow_archive(ARCHIVE_DIR, tuple(feature_names)) if ARCHIVE_DIR else None
+
+@st.cache_resource
+def load_incident_reporter(out_dir, feature_names, _explainer):
+    reporter = IncidentReporter(_explainer, feature_names, out_dir)
+    if model_watcher is not None:
+        model_watcher.add_listener(lambda loaded, prepared: setattr(reporter, "explainer", prepared[2]))
+    return reporter
+
+incident_reporter = (
+    load_incident_reporter(INCIDENT_DIR, tuple(feature_names), explainer) if INCIDENT_DIR else None
+)
+sinks = [sink for sink in (flow_index, flow_archive, incident_reporter) if sink is not None]
+
+if "sampler" not in st.session_state:
+    st.session_state["sampler"] = SamplingIndex(y_test)
+    st.session_state["host_tracker"] = HostTracker()
+    st.session_state["drift_monitor"] = DriftMonitor(drift_reference)
+sampler = st.session_state["sampler"]
+
+@st.cache_resource
+def get_engine(_model, _X_test, _y_test, _hosts, feature_key):
+    engine = ScoringEngine(
+        _model, _X_test, _y_test,
+        hosts=_hosts,
+        host_tracker=HostTracker() if _hosts is not None else None,
+        overload=OverloadController(),
+        sinks=sinks,
+        drift=DriftMonitor(drift_reference),
+        threshold=THRESHOLD,
+        windows_per_sec=MONITOR_RATE,
+        latency_slo_ms=LATENCY_SLO_MS,
+    )
+    if model_watcher is not None:
+        # Versions with the same feature schema are swapped into the running engine;
+        # a new schema gets its own engine through feature_key
+        model_watcher.add_listener(
+            lambda loaded, _: engine.set_model(loaded.scoring_model)
+            if tuple(loaded.feature_names) == feature_key else None
+        )
+    return engine
+
+engine = get_engine(scoring_model, X_test, y_test, hosts, tuple(feature_names))
+
+def background_errors():
+    # Background threads keep their last failure; these are shown on every refresh
+    components = [
+        ("Scoring engine", engine.stats()),
+        ("Flow index", flow_index),
+        ("Flow archive", flow_archive),
+        ("Incident reports", incident_reporter),
+        ("Model registry", model_watcher),
+    ]
+    errors = []
+    for name, component in components:
+        error = component.get("last_error") if isinstance(component, dict) else getattr(component, "last_error", None)
+        if error is not None:
+            errors.append((name, error))
+    return errors
 
 
 #Section 1 Simulation 
 section_header("Traffic Analysis Simulation", "sliding window engine")
 
-btn_c1, btn_c2, _ = st.columns([1, 1, 4])
+btn_c1, btn_c2, btn_c3, _ = st.columns([1, 1, 1.4, 2.6])
 
 with btn_c1:
     run_sim = st.button("▶  Run Simulation", key="run_sim", use_container_width=True)
@@ -460,27 +670,76 @@ with btn_c2:
     reset_sim = st.button("↺  Reset", key="reset_sim", use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
+with btn_c3:
+    monitoring = st.toggle("Continuous Monitoring", key="monitoring")
+
+if monitoring and "subscription" not in st.session_state:
+    st.session_state["subscription"] = engine.subscribe()
+elif not monitoring and "subscription" in st.session_state:
+    engine.unsubscribe(st.session_state.pop("subscription"))
+
+sc1, sc2, sc3 = st.columns([2, 2, 1])
+
+with sc1:
+    scenario_name = st.selectbox(
+        "Traffic Scenario", ["Dataset Mix", "Fixed Attack Ratio", "DDoS Ramp"], key="scenario"
+    )
+with sc2:
+    attack_ratio = st.slider(
+        "Attack Ratio", 0.0, 1.0, round(sampler.base_attack_ratio, 2), 0.05,
+        key="attack_ratio", disabled=scenario_name != "Fixed Attack Ratio",
+    )
+with sc3:
+    seed = st.number_input("Seed", min_value=0, value=42, step=1, key="seed")
+
+scenario_key = (scenario_name, attack_ratio, int(seed))
+if st.session_state.get("scenario_key") != scenario_key:
+    st.session_state["scenario_key"] = scenario_key
+    sampler.reseed(int(seed))
+    if scenario_name == "Fixed Attack Ratio":
+        sampler.set_scenario(constant_scenario(attack_ratio))
+    elif scenario_name == "DDoS Ramp":
+        sampler.set_scenario(ramp_scenario())
+    else:
+        sampler.set_scenario(None)
+
 if run_sim:
     with st.spinner("Analyzing traffic window..."):
-        event = simulate_window(model, X_test, y_test)
+        event = simulate_window(
+            scoring_model, X_test, y_test, sampler=sampler,
+            hosts=hosts, host_tracker=st.session_state["host_tracker"],
+            sinks=[*sinks, st.session_state["drift_monitor"]],
+        )
     st.session_state["last_event"] = event
     st.session_state["alert_log"].append(event)
+    degraded = check_latency_slo(event, LATENCY_SLO_MS)
+    if degraded:
+        st.session_state["alert_log"].append(degraded)
+    drifted = st.session_state["drift_monitor"].check(event)
+    if drifted:
+        st.session_state["alert_log"].append(drifted)
     st.rerun()
 
 if reset_sim:
     st.session_state["alert_log"] = []
     st.session_state.pop("last_event", None)
+    st.session_state["trend"] = TrendDownsampler(TREND_MAX_POINTS)
+    st.session_state["host_tracker"] = HostTracker()
+    st.session_state["drift_monitor"] = DriftMonitor(drift_reference)
+    if "subscription" in st.session_state:
+        st.session_state["subscription"].cursor = engine.bus.head
     st.rerun()
 
 if "last_event" in st.session_state:
     event = st.session_state["last_event"]
     st.markdown("<div style='margin-top:1.8rem;'></div>", unsafe_allow_html=True)
 
-    wk1, wk2, wk3, wk4 = st.columns(4)
+    wk1, wk2, wk3, wk4, wk5 = st.columns(5)
     wk1.metric("Packets Analyzed",  event["window_size"])
     wk2.metric("Malicious Packets", event["attack_count"])
     wk3.metric("Mean Risk Score",   f"{event['mean_risk_score']:.3f}")
     wk4.metric("Alert Triggered",   "YES" if event["alert_triggered"] else "NO")
+    wk5.metric("Window Latency",    f"{event.get('latency_ms', 0.0):.1f} ms")
 
     severity_chip(event["severity"])
 
@@ -488,103 +747,184 @@ if "last_event" in st.session_state:
 # Section 2 Chart + Log
 neon_divider()
 
-THRESHOLD = 0.6
-
-if st.session_state["alert_log"]:
-    log_df = pd.DataFrame(st.session_state["alert_log"])
-    section_header("Risk Score Trend", f"{len(log_df)} windows captured")
+def pull_monitor_events():
+    for event in engine.poll(st.session_state["subscription"]):
+        st.session_state["alert_log"].append(event)
+        if event.get("event_type", "window") == "window":
+            st.session_state["last_event"] = event
+    trim_alert_log()
+
+
+@st.fragment(run_every=MONITOR_REFRESH_SEC if monitoring else None)
+def risk_trend_and_log():
+    if "subscription" in st.session_state:
+        pull_monitor_events()
+        stats = engine.stats()
+        st.caption(
+            f"Shared scoring engine · {stats['subscribers']} live session(s) · "
+            f"{stats['events_published']} events published"
+        )
+
+    for name, error in background_errors():
+        st.error(f"{name} failed: {type(error).__name__}: {error}")
+
+    trend = st.session_state["trend"]
+    trend.extend_from_log(st.session_state["alert_log"])
+
+    if trend.count:
+        # Only the most recent events are sent to the browser
+        log_df = pd.DataFrame(st.session_state["alert_log"][-ALERT_LOG_ROWS:])
+        section_header("Risk Score Trend", f"{trend.count} windows captured")
+
+        tc1, tc2 = st.columns([1, 3])
+        with tc1:
+            show_latency = st.checkbox("Overlay scoring latency", key="show_latency")
+
+        # Zooming into a range resamples just that range, down to full detail
+        view_start, view_end = 0, trend.count - 1
+        if trend.count > TREND_MAX_POINTS:
+            with tc2:
+                view_start, view_end = st.slider(
+                    "Window Range", 0, trend.count - 1, (0, trend.count - 1), key="trend_range"
+                )
+        series = trend.series(view_start, view_end)
+
+        # ── Dynamic Y-axis: start capped at threshold; expand when scores exceed it ──
+        max_score = series["risk"].max()
+        if max_score > THRESHOLD:
+            y_max = min(1.05, max_score + 0.08)
+        else:
+            # Cap slightly above threshold so chart always shows the threshold line
+            y_max = THRESHOLD + 0.08
+
+        fig = go.Figure()
+
+        # Shaded fill
+        fig.add_trace(go.Scatter(
+            x=series["x"], y=series["risk"],
+            fill="tozeroy", fillcolor="rgba(99,179,237,0.04)",
+            line=dict(color="rgba(0,0,0,0)"),
+            showlegend=False, hoverinfo="skip",
+        ))
+
+        severity_colors = SEVERITY_PALETTE[series["severity"] + 1]
+
+        fig.add_trace(go.Scatter(
+            x=series["x"],
+            y=series["risk"],
+            customdata=series["labels"],
+            mode="lines+markers",
+            line=dict(color="#63B3ED", width=2),
+            marker=dict(
+                color=severity_colors, size=8,
+                line=dict(color="#080D14", width=2)
+            ),
+            name="Risk Score",
+            hovertemplate="<b>%{customdata}</b> · window %{x}<br>Risk: %{y:.3f}<extra></extra>",
+        ))
+
+        if show_latency:
+            fig.add_trace(go.Scatter(
+                x=series["x"],
+                y=series["latency"],
+                customdata=series["labels"],
+                mode="lines",
+                line=dict(color="rgba(246,173,85,0.7)", width=1.5, dash="dot"),
+                name="Scoring Latency",
+                yaxis="y2",
+                hovertemplate="<b>%{customdata}</b><br>Scoring: %{y:.1f} ms<extra></extra>",
+            ))
+
+        fig.add_hline(
+            y=THRESHOLD, line_dash="dot",
+            line_color="rgba(252,129,129,0.5)", line_width=1.5,
+            annotation_text="Alert Threshold (0.6)",
+            annotation_font=dict(color="#FC8181", family="JetBrains Mono", size=10),
+            annotation_position="top left",
+        )
+
+        fig.update_layout(
+            paper_bgcolor="rgba(0,0,0,0)",
+            plot_bgcolor="rgba(13,21,32,0.95)",
+            font=dict(family="JetBrains Mono", color="#4A6480", size=10),
+            margin=dict(t=16, b=44, l=58, r=24),
+            height=280,
+            xaxis=dict(
+                gridcolor="rgba(99,179,237,0.05)",
+                linecolor="rgba(99,179,237,0.1)",
+                tickfont=dict(size=9, color="#4A6480"),
+                tickangle=-20,
+                title=dict(text="window", font=dict(size=9, color="#4A6480")),
+            ),
+            yaxis=dict(
+                gridcolor="rgba(99,179,237,0.05)",
+                linecolor="rgba(99,179,237,0.1)",
+                tickfont=dict(size=9, color="#4A6480"),
+                range=[0, y_max],
+                dtick=0.1,
+            ),
+            yaxis2=dict(
+                overlaying="y",
+                side="right",
+                showgrid=False,
+                tickfont=dict(size=9, color="#F6AD55"),
+                title=dict(text="ms", font=dict(size=9, color="#F6AD55")),
+                visible=show_latency,
+                rangemode="tozero",
+            ),
+            showlegend=False,
+            hoverlabel=dict(
+                bgcolor="#0D1520",
+                font=dict(family="JetBrains Mono", color="#90CDF4", size=11),
+                bordercolor="rgba(99,179,237,0.25)",
+            ),
+        )
+
+        st.plotly_chart(fig, use_container_width=True)
+
+        # Alert log 
+        section_header("Gateway Alert Log", f"latest {ALERT_LOG_ROWS} events, most recent first")
+
+        st.dataframe(
+            log_df.sort_values(by="timestamp", ascending=False),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "timestamp":       st.column_config.TextColumn("Timestamp"),
+                "window_id":       st.column_config.TextColumn("Window ID"),
+                "event_type":      st.column_config.TextColumn("Event"),
+                "window_size":     st.column_config.NumberColumn("Window Size",  format="%d"),
+                "attack_count":    st.column_config.NumberColumn("Attacks",      format="%d"),
+                "mean_risk_score": st.column_config.NumberColumn("Risk Score",   format="%.3f"),
+                "severity":        st.column_config.TextColumn("Severity"),
+                "alert_triggered": st.column_config.CheckboxColumn("Alert"),
+                "sample_ms":       st.column_config.NumberColumn("Sample (ms)",  format="%.2f"),
+                "score_ms":        st.column_config.NumberColumn("Score (ms)",   format="%.2f"),
+                "classify_ms":     st.column_config.NumberColumn("Classify (ms)", format="%.2f"),
+                "latency_ms":      st.column_config.NumberColumn("Latency (ms)", format="%.2f"),
+                "flows_per_sec":   st.column_config.NumberColumn("Flows/s",      format="%.0f"),
+                "slo_ms":          st.column_config.NumberColumn("SLO (ms)",     format="%.0f"),
+                "error":           st.column_config.TextColumn("Error"),
+                "flows_scored":    st.column_config.NumberColumn("Scored",       format="%d"),
+                "sampled":         st.column_config.CheckboxColumn("Sampled"),
+                "sample_rate":     st.column_config.NumberColumn("Sample Rate",  format="%.2f"),
+                "risk_ci_low":     st.column_config.NumberColumn("Risk CI Low",  format="%.3f"),
+                "risk_ci_high":    st.column_config.NumberColumn("Risk CI High", format="%.3f"),
+                "queue_depth":     st.column_config.NumberColumn("Queue",        format="%d"),
+                "top_sources":     st.column_config.TextColumn("Top Sources"),
+                "top_destinations": st.column_config.TextColumn("Top Destinations"),
+                "drifted_features": st.column_config.NumberColumn("Drifted",      format="%d"),
+                "drift_features":  st.column_config.TextColumn("Drift Features"),
+                "max_psi":         st.column_config.NumberColumn("Max PSI",      format="%.3f"),
+                "max_ks":          st.column_config.NumberColumn("Max KS",       format="%.3f"),
+            },
+        )
 
-    # ── Dynamic Y-axis: start capped at threshold; expand when scores exceed it ──
-    max_score = log_df["mean_risk_score"].max()
-    if max_score > THRESHOLD:
-        y_max = min(1.05, max_score + 0.08)
     else:
-        # Cap slightly above threshold so chart always shows the threshold line
-        y_max = THRESHOLD + 0.08
-
-    fig = go.Figure()
-
-    # Shaded fill
-    fig.add_trace(go.Scatter(
-        x=log_df["timestamp"], y=log_df["mean_risk_score"],
-        fill="tozeroy", fillcolor="rgba(99,179,237,0.04)",
-        line=dict(color="rgba(0,0,0,0)"),
-        showlegend=False, hoverinfo="skip",
-    ))
-
-    severity_colors = log_df["severity"].map(
-        {"LOW": "#68D391", "MEDIUM": "#F6AD55", "HIGH": "#FC8181"}
-    ).fillna("#63B3ED")
-
-    fig.add_trace(go.Scatter(
-        x=log_df["timestamp"],
-        y=log_df["mean_risk_score"],
-        mode="lines+markers",
-        line=dict(color="#63B3ED", width=2),
-        marker=dict(
-            color=severity_colors, size=8,
-            line=dict(color="#080D14", width=2)
-        ),
-        name="Risk Score",
-        hovertemplate="<b>%{x}</b><br>Risk: %{y:.3f}<extra></extra>",
-    ))
-
-    fig.add_hline(
-        y=THRESHOLD, line_dash="dot",
-        line_color="rgba(252,129,129,0.5)", line_width=1.5,
-        annotation_text="Alert Threshold (0.6)",
-        annotation_font=dict(color="#FC8181", family="JetBrains Mono", size=10),
-        annotation_position="top left",
-    )
+        empty_state("NO ALERTS LOGGED — RUN A SIMULATION TO POPULATE THE LOG")
 
-    fig.update_layout(
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(13,21,32,0.95)",
-        font=dict(family="JetBrains Mono", color="#4A6480", size=10),
-        margin=dict(t=16, b=44, l=58, r=24),
-        height=280,
-        xaxis=dict(
-            gridcolor="rgba(99,179,237,0.05)",
-            linecolor="rgba(99,179,237,0.1)",
-            tickfont=dict(size=9, color="#4A6480"),
-            tickangle=-20,
-        ),
-        yaxis=dict(
-            gridcolor="rgba(99,179,237,0.05)",
-            linecolor="rgba(99,179,237,0.1)",
-            tickfont=dict(size=9, color="#4A6480"),
-            range=[0, y_max],
-            dtick=0.1,
-        ),
-        showlegend=False,
-        hoverlabel=dict(
-            bgcolor="#0D1520",
-            font=dict(family="JetBrains Mono", color="#90CDF4", size=11),
-            bordercolor="rgba(99,179,237,0.25)",
-        ),
-    )
 
-    st.plotly_chart(fig, use_container_width=True)
-
-    # Alert log 
-    section_header("Gateway Alert Log", "sorted by most recent")
-
-    st.dataframe(
-        log_df.sort_values(by="timestamp", ascending=False),
-        use_container_width=True,
-        hide_index=True,
-        column_config={
-            "timestamp":       st.column_config.TextColumn("Timestamp"),
-            "window_size":     st.column_config.NumberColumn("Window Size",  format="%d"),
-            "attack_count":    st.column_config.NumberColumn("Attacks",      format="%d"),
-            "mean_risk_score": st.column_config.NumberColumn("Risk Score",   format="%.3f"),
-            "severity":        st.column_config.TextColumn("Severity"),
-            "alert_triggered": st.column_config.CheckboxColumn("Alert"),
-        },
-    )
-
-else:
-    empty_state("NO ALERTS LOGGED — RUN A SIMULATION TO POPULATE THE LOG")
+risk_trend_and_log()
 
 
 # Section 3 Packet Analysis 
@@ -595,7 +935,7 @@ pc1, pc2, _ = st.columns([1, 1, 4])
 
 with pc1:
     if st.button("⬡  Capture Random Packet", use_container_width=True):
-        packet, actual = get_random_packet(X_test, y_test)
+        packet, actual = get_random_packet(X_test, y_test, sampler)
         st.session_state["packet"] = packet
         st.session_state["actual"] = actual
 
@@ -611,7 +951,7 @@ with pc2:
 
 if "packet" in st.session_state:
     packet     = st.session_state["packet"]
-    prediction = predict(model, packet)
+    prediction = predict(scoring_model, packet)
     packet_df  = packet.to_frame().T
 
     neon_divider()
@@ -634,9 +974,13 @@ if "packet" in st.session_state:
         st.markdown("<div style='margin-top:0.5rem;'></div>", unsafe_allow_html=True)
         result_card(prediction == 0)
 
-    shap_vector, explanation_text = generate_shap_analysis(
-        explainer, packet_df, feature_names, prediction
-    )
+    try:
+        shap_vector, explanation_text = explainer.explain(
+            packet_df, feature_names, prediction
+        ).result(timeout=explainer.lease_timeout)
+    except TimeoutError:
+        empty_state("ALL EXPLAINERS ARE BUSY — CAPTURE THE PACKET AGAIN SHORTLY")
+        st.stop()
 
     impact_df = pd.DataFrame({"Feature": feature_names, "Impact": shap_vector})
     impact_df["AbsImpact"] = impact_df["Impact"].abs()
@@ -700,6 +1044,93 @@ if "packet" in st.session_state:
     </div>
     """, unsafe_allow_html=True)
 
+    neon_divider()
+    section_header("Similar Historical Flows", "nearest neighbours in feature space")
+
+    st.dataframe(
+        pd.DataFrame(flow_index.query(packet, k=5)),
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Distance": st.column_config.NumberColumn("Distance", format="%.4f"),
+            "Risk":     st.column_config.NumberColumn("Risk",     format="%.3f"),
+        },
+    )
+
+
+# Section 4 Flow Archive
+if flow_archive is not None:
+    neon_divider()
+    section_header("Flow Archive", f"{flow_archive.rows_archived:,} flows archived")
+
+    ac1, ac2, ac3, _ = st.columns([1.2, 1.2, 1, 2.6])
+    with ac1:
+        lookback_min = st.number_input("Look-back (minutes)", min_value=1, max_value=7 * 24 * 60, value=15)
+    with ac2:
+        min_risk = st.slider("Minimum risk", 0.0, 1.0, THRESHOLD, 0.05)
+    with ac3:
+        st.markdown("<div style='margin-top:1.75rem;'></div>", unsafe_allow_html=True)
+        run_query = st.button("⌕  Query Archive", use_container_width=True)
+
+    if run_query:
+        flow_archive.flush(timeout=10)
+        now = pd.Timestamp.now()
+        try:
+            st.session_state["archive_hits"] = query_archive(
+                ARCHIVE_DIR, start=now - pd.Timedelta(minutes=lookback_min), end=now, min_risk=min_risk
+            )
+        except FileNotFoundError:
+            st.session_state["archive_hits"] = pd.DataFrame()
+
+    if "archive_hits" in st.session_state:
+        hits = st.session_state["archive_hits"]
+        if len(hits):
+            st.dataframe(
+                hits.sort_values("timestamp", ascending=False).head(1000),
+                use_container_width=True,
+                hide_index=True,
+            )
+        else:
+            empty_state("NO ARCHIVED FLOWS MATCH THIS QUERY")
+
+
+# Section 5 Pipeline Performance
+if profiling.is_enabled():
+    neon_divider()
+    section_header("Pipeline Performance", "per-stage latency")
+
+    perf_rows = profiling.stage_summary()
+    if perf_rows:
+        st.dataframe(
+            pd.DataFrame(perf_rows),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "stage":           st.column_config.TextColumn("Stage"),
+                "calls":           st.column_config.NumberColumn("Calls",       format="%d"),
+                "mean_ms":         st.column_config.NumberColumn("Mean (ms)",   format="%.2f"),
+                "p50_ms":          st.column_config.NumberColumn("p50 (ms)",    format="%.2f"),
+                "p95_ms":          st.column_config.NumberColumn("p95 (ms)",    format="%.2f"),
+                "p99_ms":          st.column_config.NumberColumn("p99 (ms)",    format="%.2f"),
+                "memory_delta_kb": st.column_config.NumberColumn("Memory Δ (KB)", format="%.1f"),
+            },
+        )
+    else:
+        empty_state("NO STAGE TIMINGS RECORDED YET")
+
+    pool_stats = explainer.stats()
+    e1, e2, e3, e4 = st.columns(4)
+    e1.metric("Explainers Busy", f"{pool_stats['busy']} / {pool_stats['size']}")
+    e2.metric("Explainer Utilization", f"{pool_stats['utilization']:.0%}")
+    e3.metric("Mean Lease Wait", f"{pool_stats['mean_wait_ms']:.1f} ms")
+    e4.metric("Lease Timeouts", pool_stats["timeouts"])
+
+    cache_stats = flow_store.cache_stats()
+    f1, f2, f3 = st.columns(3)
+    f1.metric("Flow Store Cache Hit Ratio", f"{cache_stats['hit_ratio']:.0%}")
+    f2.metric("Cached Blocks", cache_stats["cached_blocks"])
+    f3.metric("Cache Size", f"{cache_stats['cache_bytes'] / 2**20:.1f} MB")
+
 
 #Footer 
 st.markdown("""
@@ -0,0 +1,181 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+HOUR_FORMAT = "%Y-%m-%dT%H"
+_FLUSH = object()
+_CLOSE = object()
+
+logger = logging.getLogger(__name__)
+
+
+class FlowArchive:
+
+    def __init__(self, root, feature_names, batch_rows=50000, flush_seconds=300.0,
+                 compression="zstd", max_pending=256):
+        self.root = root
+        self.feature_names = list(feature_names)
+        self.batch_rows = batch_rows
+        # Long enough that files hold thousands of rows even at a trickle; a
+        # short age would leave hundreds of tiny files in every hour partition
+        self.flush_seconds = flush_seconds
+        self.compression = compression
+
+        self.rows_archived = 0
+        self.files_written = 0
+        self.dropped_windows = 0
+        self.failed_windows = 0
+        self.last_error = None
+
+        self._closed = False
+        self._queue = queue.Queue(max_pending)
+        self._flushed = threading.Condition()
+        self._pending_windows = 0
+        self._thread = threading.Thread(target=self._run, name="flow-archive", daemon=True)
+        self._thread.start()
+        # Up to flush_seconds of windows sit in memory; the daemon thread would
+        # drop them at interpreter exit, so they are written out first
+        atexit.register(self.close)
+
+    def consume(self, X_window, probabilities, event):
+        # Only references are queued here; building and writing the Parquet
+        # batch happens on the archive thread
+        event.setdefault("window_id", uuid.uuid4().hex[:12])
+        if self._closed:
+            self.dropped_windows += 1
+            return
+        item = (X_window, probabilities, event["window_id"], datetime.now())
+        try:
+            with self._flushed:
+                self._pending_windows += 1
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # Never stall the scorer on a slow disk
+            with self._flushed:
+                self._pending_windows -= 1
+                self.dropped_windows += 1
+
+    def _to_table(self, items):
+        features = np.concatenate([
+            np.asarray(X_window[self.feature_names] if isinstance(X_window, pd.DataFrame) else X_window,
+                       dtype=np.float32)
+            for X_window, _, _, _ in items
+        ])
+        probabilities = np.concatenate([np.asarray(p, dtype=np.float32) for _, p, _, _ in items])
+        counts = [len(p) for _, p, _, _ in items]
+
+        columns = {name: features[:, j] for j, name in enumerate(self.feature_names)}
+        columns["probability"] = probabilities
+        columns["prediction"] = (probabilities > 0.5).astype(np.int8)
+        columns["window_id"] = np.repeat([window_id for _, _, window_id, _ in items], counts)
+        columns["timestamp"] = np.repeat(np.array([ts for _, _, _, ts in items], dtype="datetime64[ms]"), counts)
+        columns["hour"] = np.repeat([ts.strftime(HOUR_FORMAT) for _, _, _, ts in items], counts)
+        return pa.table(columns)
+
+    def _write(self, items):
+        table = self._to_table(items)
+        ds.write_dataset(
+            table, self.root,
+            format="parquet",
+            partitioning=ds.partitioning(pa.schema([("hour", pa.string())]), flavor="hive"),
+            basename_template=f"flows-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            file_options=ds.ParquetFileFormat().make_write_options(compression=self.compression),
+        )
+        self.rows_archived += table.num_rows
+        self.files_written += 1
+
+    def _run(self):
+        items, rows, deadline = [], 0, None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = _FLUSH
+
+            if item is not _FLUSH and item is not _CLOSE:
+                items.append(item)
+                rows += len(item[1])
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_seconds
+                if rows < self.batch_rows:
+                    continue
+
+            if items:
+                try:
+                    self._write(items)
+                except Exception as exc:
+                    logger.exception("Writing %d archived windows failed", len(items))
+                    self.last_error = exc
+                    self.failed_windows += len(items)
+
+            with self._flushed:
+                self._pending_windows -= len(items)
+                self._flushed.notify_all()
+            items, rows, deadline = [], 0, None
+            if item is _CLOSE:
+                return
+
+    def flush(self, timeout=None):
+        # Write whatever is buffered now and wait until it is on disk
+        self._queue.put(_FLUSH)
+        with self._flushed:
+            return self._flushed.wait_for(lambda: self._pending_windows == 0, timeout)
+
+    def close(self, timeout=60.0):
+        # Later windows are dropped; everything already queued is written
+        # before the archive thread exits
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        self._queue.put(_CLOSE)
+        self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            "rows_archived": self.rows_archived,
+            "files_written": self.files_written,
+            "pending_windows": self._pending_windows,
+            "dropped_windows": self.dropped_windows,
+            "failed_windows": self.failed_windows,
+        }
+
+
+def query_archive(root, start=None, end=None, min_risk=None, max_risk=None,
+                  where=None, columns=None):
+    dataset = ds.dataset(root, format="parquet", partitioning="hive")
+
+    # Bounds on the hour partition prune whole directories before any file is
+    # opened; the remaining predicates are pushed down to Parquet row groups
+    conditions = []
+    if start is not None:
+        start = pd.Timestamp(start)
+        conditions.append(ds.field("hour") >= start.strftime(HOUR_FORMAT))
+        conditions.append(ds.field("timestamp") >= pa.scalar(start.to_pydatetime(), pa.timestamp("ms")))
+    if end is not None:
+        end = pd.Timestamp(end)
+        conditions.append(ds.field("hour") <= end.strftime(HOUR_FORMAT))
+        conditions.append(ds.field("timestamp") <= pa.scalar(end.to_pydatetime(), pa.timestamp("ms")))
+    if min_risk is not None:
+        conditions.append(ds.field("probability") >= min_risk)
+    if max_risk is not None:
+        conditions.append(ds.field("probability") <= max_risk)
+    if where is not None:
+        conditions.append(where)
+
+    condition = None
+    for expression in conditions:
+        condition = expression if condition is None else condition & expression
+
+    return dataset.to_table(filter=condition, columns=columns).to_pandas()
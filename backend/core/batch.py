@@ -0,0 +1,114 @@
+import argparse
+import hashlib
+import struct
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from backend.core.dedup import dedup_predict_proba
+from backend.core.model import load_features
+
+MAGIC = b"NIDB"
+VERSION = 1
+LAYOUTS = {"rows": 0, "columns": 1}
+
+# magic, version, layout, reserved, rows, columns, schema id; padded to 64 bytes
+# so the float32 payload that follows starts on a cache-line boundary
+HEADER = struct.Struct("<4sHBBQI16s28x")
+
+
+def schema_id(feature_names):
+    return hashlib.blake2b("\n".join(feature_names).encode(), digest_size=16).digest()
+
+
+def batch_header(n_rows, feature_names, layout="rows"):
+    return HEADER.pack(MAGIC, VERSION, LAYOUTS[layout], 0, n_rows, len(feature_names), schema_id(feature_names))
+
+
+def parse_header(buffer, offset=0):
+    magic, version, layout, _, n_rows, n_columns, schema = HEADER.unpack_from(buffer, offset)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Not a flow batch (magic={magic!r}, version={version})")
+    return {
+        "layout": "columns" if layout == LAYOUTS["columns"] else "rows",
+        "rows": n_rows,
+        "columns": n_columns,
+        "schema": schema,
+        "nbytes": HEADER.size + n_rows * n_columns * 4,
+    }
+
+
+def pack_batch(values, feature_names, layout="rows"):
+    values = np.asarray(values, dtype=np.float32)
+    if values.ndim != 2 or values.shape[1] != len(feature_names):
+        raise ValueError(f"Expected (rows, {len(feature_names)}) values, got {values.shape}")
+    payload = values if layout == "rows" else values.T
+    return batch_header(len(values), feature_names, layout) + np.ascontiguousarray(payload).tobytes()
+
+
+def read_batch(buffer, feature_names=None, offset=0):
+    header = parse_header(buffer, offset)
+    if feature_names is not None and header["schema"] != schema_id(feature_names):
+        raise ValueError("Batch schema does not match the model's feature list")
+
+    n_rows, n_columns = header["rows"], header["columns"]
+    # A view over the caller's buffer; nothing is parsed or copied
+    values = np.frombuffer(buffer, dtype=np.float32, count=n_rows * n_columns, offset=offset + HEADER.size)
+    if header["layout"] == "columns":
+        return values.reshape(n_columns, n_rows).T
+    return values.reshape(n_rows, n_columns)
+
+
+def append_batch(handle, values, feature_names, layout="rows"):
+    handle.write(pack_batch(values, feature_names, layout))
+
+
+def write_batch_file(path, batches, feature_names, layout="rows"):
+    with open(path, "wb") as handle:
+        for values in batches:
+            append_batch(handle, values, feature_names, layout)
+
+
+def iter_batch_file(path, feature_names=None):
+    # The file is memory-mapped, so each batch is a view over the page cache
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    offset = 0
+    while offset < len(data):
+        yield read_batch(data, feature_names, offset)
+        offset += parse_header(data, offset)["nbytes"]
+
+
+def score_batch(model, batch, feature_names=None):
+    # Either a batch frame (bytes, bytearray, memoryview, mmap) or a view already read from one
+    values = batch if isinstance(batch, np.ndarray) and batch.ndim == 2 else read_batch(batch, feature_names)
+    if len(values) == 0:
+        return np.zeros(0)
+    with warnings.catch_warnings():
+        # Batches carry their schema in the header instead of DataFrame column labels
+        warnings.filterwarnings("ignore", message="X does not have valid feature names", category=UserWarning)
+        return dedup_predict_proba(model, values)[:, 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a flow CSV into a binary batch file.")
+    parser.add_argument("csv", help="CICIDS-style flow CSV")
+    parser.add_argument("out", help="batch file to write")
+    parser.add_argument("--features", default="backend/model/rf_features.pkl")
+    parser.add_argument("--batch-rows", type=int, default=5000)
+    parser.add_argument("--layout", choices=list(LAYOUTS), default="rows")
+    args = parser.parse_args()
+
+    feature_names = list(load_features(args.features))
+
+    def batches():
+        for chunk in pd.read_csv(args.csv, chunksize=args.batch_rows, low_memory=False):
+            chunk.columns = chunk.columns.str.strip()
+            chunk = chunk.replace([np.inf, -np.inf], np.nan).dropna(subset=feature_names)
+            yield chunk[feature_names].to_numpy(np.float32)
+
+    write_batch_file(args.out, batches(), feature_names, args.layout)
+
+
+if __name__ == "__main__":
+    main()
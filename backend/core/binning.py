@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingClassifier
+
+MAX_BINS = 255
+
+
+class FeatureBinner:
+
+    def __init__(self, max_bins=MAX_BINS):
+        self.max_bins = max_bins
+        self.bin_edges = []
+
+    def fit(self, X):
+        values = np.asarray(X, dtype=np.float64)
+        self.bin_edges = []
+        for column in values.T:
+            distinct = np.unique(column)
+            if len(distinct) <= self.max_bins:
+                # One bin per distinct value, split halfway between neighbours
+                edges = (distinct[:-1] + distinct[1:]) / 2
+            else:
+                quantiles = np.quantile(column, np.linspace(0, 1, self.max_bins + 1)[1:-1])
+                edges = np.unique(quantiles)
+            self.bin_edges.append(edges)
+        return self
+
+    def transform(self, X):
+        values = np.asarray(X, dtype=np.float64)
+        codes = np.empty(values.shape, dtype=np.uint8)
+        for j, edges in enumerate(self.bin_edges):
+            codes[:, j] = np.searchsorted(edges, values[:, j], side="right")
+        return codes
+
+
+class BinnedModel:
+
+    def __init__(self, binner, estimator, feature_names):
+        self.binner = binner
+        self.estimator = estimator
+        self.feature_names = list(feature_names)
+        self.classes_ = estimator.classes_
+
+    def transform(self, X):
+        return pd.DataFrame(self.binner.transform(X), columns=self.feature_names)
+
+    def predict_proba(self, X):
+        return self.estimator.predict_proba(self.transform(X))
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def train_binned_model(X_train, y_train, max_iter=200, learning_rate=0.1, random_state=42):
+    binner = FeatureBinner().fit(X_train)
+    codes = pd.DataFrame(binner.transform(X_train), columns=X_train.columns)
+
+    estimator = HistGradientBoostingClassifier(
+        max_iter=max_iter,
+        learning_rate=learning_rate,
+        max_bins=MAX_BINS,
+        random_state=random_state
+    )
+    estimator.fit(codes, y_train)
+
+    return BinnedModel(binner, estimator, X_train.columns), codes
@@ -0,0 +1,116 @@
+import hashlib
+import io
+import pickle
+
+import numpy as np
+import pandas as pd
+from numpy.lib.recfunctions import repack_fields
+from sklearn.ensemble import RandomForestClassifier
+
+CANDIDATE_BANDS = ((0.01, 0.99), (0.02, 0.98), (0.05, 0.95), (0.1, 0.9), (0.2, 0.8), (0.3, 0.7))
+
+
+class CascadeClassifier:
+
+    def __init__(self, first_stage, full_model, feature_names, stage_features, low=0.05, high=0.95):
+        self.first_stage = first_stage
+        self.full_model = full_model
+        self.feature_names = list(feature_names)
+        self.stage_features = list(stage_features)
+        self.low = low
+        self.high = high
+        self.classes_ = full_model.classes_
+        # Identifies the exact fitted forest, so a cascade is never paired with a retrained one
+        self.model_fingerprint = model_fingerprint(full_model)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.flows_scored = 0
+        self.flows_forwarded = 0
+
+    @property
+    def short_circuit_ratio(self):
+        if self.flows_scored == 0:
+            return 0.0
+        return 1.0 - self.flows_forwarded / self.flows_scored
+
+    def _as_frame(self, X):
+        if isinstance(X, pd.DataFrame):
+            return X
+        return pd.DataFrame(np.asarray(X), columns=self.feature_names)
+
+    def uncertain_mask(self, X):
+        X = self._as_frame(X)
+        stage_prob = self.first_stage.predict_proba(X[self.stage_features])[:, 1]
+        return (stage_prob > self.low) & (stage_prob < self.high), stage_prob
+
+    def predict_proba(self, X):
+        X = self._as_frame(X)
+        uncertain, stage_prob = self.uncertain_mask(X)
+        proba = np.column_stack([1.0 - stage_prob, stage_prob])
+
+        forwarded = int(uncertain.sum())
+        if forwarded:
+            proba[uncertain] = self.full_model.predict_proba(X[uncertain])
+
+        self.flows_scored += len(X)
+        self.flows_forwarded += forwarded
+        return proba
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+class _FingerprintPickler(pickle.Pickler):
+
+    def reducer_override(self, obj):
+        # Structured arrays such as tree nodes carry uninitialised padding
+        # bytes, so a fitted model and its reloaded copy pickle differently
+        if isinstance(obj, np.ndarray) and obj.dtype.names:
+            packed = repack_fields(obj, align=False)
+            if packed.dtype.itemsize != obj.dtype.itemsize:
+                return np.asarray, (packed,)
+        return NotImplemented
+
+
+def model_fingerprint(model):
+    buffer = io.BytesIO()
+    pickler = _FingerprintPickler(buffer, protocol=4)
+    # Without the memo the bytes depend only on values, not on which objects
+    # happen to be shared after a reload
+    pickler.fast = True
+    pickler.dump(model)
+    return hashlib.blake2b(buffer.getbuffer(), digest_size=16).hexdigest()
+
+
+def select_band(first_stage, full_model, X_val, stage_features, max_disagreement=0.001):
+    stage_prob = first_stage.predict_proba(X_val[stage_features])[:, 1]
+    full_pred = full_model.predict(X_val)
+
+    # Narrowest band whose settled flows agree with the full forest
+    for low, high in CANDIDATE_BANDS[::-1]:
+        settled = (stage_prob <= low) | (stage_prob >= high)
+        if not settled.any():
+            continue
+        disagreement = np.mean((stage_prob[settled] >= high) != (full_pred[settled] == 1))
+        if disagreement <= max_disagreement:
+            return low, high
+    return CANDIDATE_BANDS[0]
+
+
+def train_cascade(full_model, X_train, y_train, X_val, top_features=10, n_estimators=8,
+                  max_depth=6, max_disagreement=0.001, random_state=42):
+    feature_names = list(X_train.columns)
+    order = np.argsort(full_model.feature_importances_)[::-1][:top_features]
+    stage_features = [feature_names[i] for i in order]
+
+    first_stage = RandomForestClassifier(
+        n_estimators=n_estimators,
+        max_depth=max_depth,
+        random_state=random_state,
+        n_jobs=-1
+    )
+    first_stage.fit(X_train[stage_features], y_train)
+
+    low, high = select_band(first_stage, full_model, X_val, stage_features, max_disagreement)
+    return CascadeClassifier(first_stage, full_model, feature_names, stage_features, low, high)
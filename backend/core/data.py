@@ -1,20 +1,28 @@
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
+from backend.core.profiling import profiled
 
-def load_dataset(filepath):
-    df = pd.read_csv(filepath)
+def clean_flows(df, keep_hosts=False):
+    # Shared by load_dataset and the chunked flow store build, so both keep the same rows
     df.columns = df.columns.str.strip()
     df.replace([np.inf, -np.inf], np.nan, inplace=True)
     df.dropna(inplace=True)
 
-    columns_to_drop = ["Flow ID", "Source IP", "Destination IP", "Timestamp"]
+    columns_to_drop = ["Flow ID", "Timestamp"]
+    if not keep_hosts:
+        columns_to_drop += ["Source IP", "Destination IP"]
     for col in columns_to_drop:
         if col in df.columns:
             df.drop(col, axis=1, inplace=True)
 
     return df
 
+@profiled("load_dataset")
+def load_dataset(filepath):
+    return clean_flows(pd.read_csv(filepath))
+
+@profiled("split_dataset")
 def split_dataset(df, feature_names):
     X = df[feature_names]
     y = df["Label"].apply(lambda x: 0 if x == "BENIGN" else 1)
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+_projections = {}
+
+
+def _projection(n_columns):
+    if n_columns not in _projections:
+        rng = np.random.default_rng(n_columns)
+        _projections[n_columns] = rng.standard_normal((n_columns, 2))
+    return _projections[n_columns]
+
+
+def _as_array(X):
+    if isinstance(X, pd.DataFrame):
+        return X.to_numpy(dtype=np.float64)
+    X = np.asarray(X)
+    # float32 batches are hashed in place rather than widened to a float64 copy
+    return X if X.dtype in (np.float32, np.float64) else X.astype(np.float64)
+
+
+def row_keys(values):
+    # Two random projections packed as one complex key per row: a single
+    # BLAS call instead of hashing every cell
+    keys = np.ascontiguousarray(values @ _projection(values.shape[1]).astype(values.dtype, copy=False))
+    return keys.view(np.complex128 if keys.dtype == np.float64 else np.complex64).ravel()
+
+
+def unique_rows(X):
+    values = _as_array(X)
+    _, first, inverse = np.unique(row_keys(values), return_index=True, return_inverse=True)
+    inverse = inverse.ravel()
+
+    # Key collisions are vanishingly rare, but outputs must never change
+    representative = first[inverse]
+    repeated = np.flatnonzero(representative != np.arange(len(values)))
+    if not np.array_equal(values[repeated], values[representative[repeated]]):
+        _, first, inverse = np.unique(values, axis=0, return_index=True, return_inverse=True)
+        inverse = inverse.ravel()
+
+    return first, inverse
+
+
+def _take_rows(X, rows):
+    return X.iloc[rows] if isinstance(X, pd.DataFrame) else np.asarray(X)[rows]
+
+
+def dedup_predict_proba(model, X):
+    if len(X) == 0:
+        return np.zeros((0, len(model.classes_)))
+    if len(X) < 2:
+        return model.predict_proba(X)
+
+    first, inverse = unique_rows(X)
+    if len(first) == len(X):
+        return model.predict_proba(X)
+    return model.predict_proba(_take_rows(X, first))[inverse]
+
+
+def dedup_predict(model, X):
+    return model.classes_.take(np.argmax(dedup_predict_proba(model, X), axis=1))
+
+
+def duplicate_report(X):
+    first, inverse = unique_rows(X)
+    counts = np.bincount(inverse) if len(inverse) else np.zeros(0, dtype=np.intp)
+
+    return {
+        "rows": int(len(inverse)),
+        "unique_rows": int(len(first)),
+        "duplicate_ratio": 1.0 - len(first) / len(inverse) if len(inverse) else 0.0,
+        "max_multiplicity": int(counts.max()) if len(counts) else 0,
+    }
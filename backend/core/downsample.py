@@ -0,0 +1,122 @@
+import numpy as np
+
+SEVERITY_CODES = {"LOW": 0, "MEDIUM": 1, "HIGH": 2}
+
+
+def minmax_indices(y, max_points):
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+
+    # Keep the lowest and highest point of each bucket so spikes survive
+    n_buckets = max(max_points // 2, 1)
+    width = -(-n // n_buckets)
+    padded = np.full(n_buckets * width, np.nan)
+    padded[:n] = y
+    rows = padded.reshape(n_buckets, width)
+    valid = ~np.all(np.isnan(rows), axis=1)
+    offsets = np.arange(n_buckets)[valid] * width
+    rows = rows[valid]
+
+    indices = np.concatenate([
+        offsets + np.nanargmin(rows, axis=1),
+        offsets + np.nanargmax(rows, axis=1),
+        [n - 1],
+    ])
+    return np.unique(indices)
+
+
+class TrendDownsampler:
+
+    def __init__(self, max_points=600, capacity=1024):
+        self.max_points = max_points
+        self.count = 0
+        self._risk = np.empty(capacity)
+        self._latency = np.empty(capacity)
+        self._severity = np.empty(capacity, dtype=np.int8)
+        self.labels = []
+        self.bucket_width = 1
+        self.buckets = []
+        self.consumed = 0
+
+    @property
+    def risk(self):
+        return self._risk[:self.count]
+
+    @property
+    def severity(self):
+        return self._severity[:self.count]
+
+    def _grow(self):
+        capacity = 2 * len(self._risk)
+        for name in ("_risk", "_latency", "_severity"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def append(self, risk, severity, label, latency=np.nan):
+        index = self.count
+        if index == len(self._risk):
+            self._grow()
+        self._risk[index] = risk
+        self._latency[index] = latency
+        self._severity[index] = SEVERITY_CODES.get(severity, -1)
+        self.labels.append(label)
+        self.count += 1
+
+        if index // self.bucket_width == len(self.buckets):
+            self.buckets.append([index, index])
+        else:
+            bucket = self.buckets[-1]
+            if risk < self._risk[bucket[0]]:
+                bucket[0] = index
+            if risk > self._risk[bucket[1]]:
+                bucket[1] = index
+
+        if len(self.buckets) > self.max_points // 2:
+            self._merge_buckets()
+
+    def _merge_buckets(self):
+        merged = []
+        for i in range(0, len(self.buckets), 2):
+            pair = self.buckets[i:i + 2]
+            low = min((b[0] for b in pair), key=self._risk.__getitem__)
+            high = max((b[1] for b in pair), key=self._risk.__getitem__)
+            merged.append([low, high])
+        self.buckets = merged
+        self.bucket_width *= 2
+
+    def extend_from_log(self, alert_log):
+        for event in alert_log[self.consumed:]:
+            if event.get("event_type", "window") == "window":
+                self.append(
+                    event["mean_risk_score"], event["severity"],
+                    event["timestamp"], event.get("score_ms", np.nan)
+                )
+        self.consumed = len(alert_log)
+
+    def log_trimmed(self, n_events):
+        # The caller dropped the oldest events from the log it feeds in
+        self.consumed = max(self.consumed - n_events, 0)
+
+    def series(self, start=None, end=None):
+        n = self.count
+        start = 0 if start is None else max(int(start), 0)
+        end = n - 1 if end is None else min(int(end), n - 1)
+
+        if end < start:
+            indices = np.arange(0)
+        elif start == 0 and end == n - 1 and n > self.max_points:
+            indices = np.unique(np.append(np.asarray(self.buckets).ravel(), n - 1))
+        else:
+            # Zoomed in: only the requested range is resampled, at full detail if it fits
+            indices = start + minmax_indices(self._risk[start:end + 1], self.max_points)
+
+        return {
+            "x": indices,
+            "risk": self._risk[indices],
+            "latency": self._latency[indices],
+            "severity": self._severity[indices],
+            "labels": [self.labels[i] for i in indices],
+        }
@@ -0,0 +1,162 @@
+import os
+import threading
+
+import joblib
+import numpy as np
+import pandas as pd
+
+PSI_FLOOR = 1e-4
+
+
+def reference_statistics(X, n_bins=20):
+    values = np.asarray(X, dtype=np.float64)
+    edges = [
+        np.unique(np.quantile(column, np.linspace(0, 1, n_bins + 1)[1:-1]))
+        for column in values.T
+    ]
+    width = max(len(e) for e in edges) + 1
+    proportions = np.zeros((values.shape[1], width))
+    for j, column_edges in enumerate(edges):
+        counts = np.bincount(np.searchsorted(column_edges, values[:, j], side="right"), minlength=width)
+        proportions[j] = counts / len(values)
+
+    return {
+        "feature_names": list(X.columns) if isinstance(X, pd.DataFrame) else None,
+        "count": len(values),
+        "mean": values.mean(axis=0),
+        "std": values.std(axis=0),
+        "edges": edges,
+        "proportions": proportions,
+    }
+
+
+def load_reference(path):
+    if os.path.exists(path):
+        return joblib.load(path)
+    return None
+
+
+def save_reference(reference, path):
+    tmp_path = f"{path}.tmp"
+    joblib.dump(reference, tmp_path)
+    os.replace(tmp_path, path)
+
+
+class DriftMonitor:
+
+    def __init__(self, reference, psi_threshold=0.25, ks_threshold=0.2, min_flows=2000,
+                 half_life_flows=20000, check_every=10, cooldown_windows=100):
+        self.reference = reference
+        self.feature_names = reference["feature_names"]
+        self.psi_threshold = psi_threshold
+        self.ks_threshold = ks_threshold
+        self.min_flows = min_flows
+        self.half_life_flows = half_life_flows
+        self.check_every = check_every
+        self.cooldown_windows = cooldown_windows
+        self._lock = threading.Lock()
+
+        # Bin edges padded with +inf so every feature is binned in one vectorised pass
+        n_features, width = reference["proportions"].shape
+        self._edges = np.full((n_features, width - 1), np.inf)
+        for j, edges in enumerate(reference["edges"]):
+            self._edges[j, :len(edges)] = edges
+        self._offsets = np.arange(n_features) * width
+        self.reset()
+
+    def reset(self):
+        n_features, width = self.reference["proportions"].shape
+        self.count = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+        self.counts = np.zeros((n_features, width))
+        self.windows = 0
+        self.last_alert_window = None
+
+    def consume(self, X_window, probabilities, event):
+        if (isinstance(X_window, pd.DataFrame) and self.feature_names is not None
+                and list(X_window.columns) != self.feature_names):
+            X_window = X_window[self.feature_names]
+        values = np.asarray(X_window, dtype=np.float64)
+        n = len(values)
+        if n == 0:
+            return
+
+        batch_mean = values.mean(axis=0)
+        batch_m2 = ((values - batch_mean) ** 2).sum(axis=0)
+        bins = np.count_nonzero(values[:, :, None] >= self._edges[None], axis=2)
+        batch_counts = np.bincount((bins + self._offsets).ravel(), minlength=self.counts.size)
+
+        with self._lock:
+            # Welford / Chan merge of the window into the running moments
+            total = self.count + n
+            delta = batch_mean - self.mean
+            self.mean += delta * n / total
+            self.m2 += batch_m2 + delta ** 2 * self.count * n / total
+            self.count = total
+
+            # Binned sketch over the reference quantiles, decayed so it tracks recent traffic
+            self.counts *= 0.5 ** (n / self.half_life_flows)
+            self.counts += batch_counts.reshape(self.counts.shape)
+            self.windows += 1
+
+    def scores(self):
+        with self._lock:
+            live = self.counts / np.maximum(self.counts.sum(axis=1, keepdims=True), 1e-12)
+            variance = self.m2 / max(self.count - 1, 1)
+            mean = self.mean.copy()
+
+        expected = self.reference["proportions"]
+        used = (expected > 0) | (live > 0)
+        p, q = np.maximum(live, PSI_FLOOR), np.maximum(expected, PSI_FLOOR)
+        psi = np.where(used, (p - q) * np.log(p / q), 0.0).sum(axis=1)
+        ks = np.abs(np.cumsum(live, axis=1) - np.cumsum(expected, axis=1)).max(axis=1)
+
+        reference_std = np.where(self.reference["std"] > 0, self.reference["std"], 1.0)
+        return {
+            "psi": psi,
+            "ks": ks,
+            "mean_shift": (mean - self.reference["mean"]) / reference_std,
+            "std_ratio": np.sqrt(variance) / reference_std,
+        }
+
+    def summary(self, k=10):
+        scores = self.scores()
+        names = self.feature_names or [str(j) for j in range(len(scores["psi"]))]
+        order = np.argsort(scores["psi"])[::-1][:k]
+        return [
+            {
+                "feature": names[j],
+                "psi": round(float(scores["psi"][j]), 4),
+                "ks": round(float(scores["ks"][j]), 4),
+                "mean_shift": round(float(scores["mean_shift"][j]), 3),
+                "std_ratio": round(float(scores["std_ratio"][j]), 3),
+            }
+            for j in order
+        ]
+
+    def check(self, event):
+        if self.count < self.min_flows or self.windows % self.check_every:
+            return None
+        if self.last_alert_window is not None and self.windows - self.last_alert_window < self.cooldown_windows:
+            return None
+
+        scores = self.scores()
+        drifted = (scores["psi"] >= self.psi_threshold) | (scores["ks"] >= self.ks_threshold)
+        if not drifted.any():
+            return None
+
+        self.last_alert_window = self.windows
+        names = self.feature_names or [str(j) for j in range(len(drifted))]
+        worst = np.argsort(np.where(drifted, scores["psi"], -np.inf))[::-1][:3]
+        return {
+            "timestamp": event["timestamp"],
+            "event_type": "drift",
+            "window_size": event["window_size"],
+            "severity": "DRIFT",
+            "alert_triggered": True,
+            "drifted_features": int(drifted.sum()),
+            "drift_features": ", ".join(names[j] for j in worst if drifted[j]),
+            "max_psi": round(float(scores["psi"].max()), 4),
+            "max_ks": round(float(scores["ks"].max()), 4),
+        }
@@ -0,0 +1,49 @@
+import time
+
+from backend.core.events import EventBus
+from backend.core.monitor import MonitoringWorker
+
+
+class ScoringEngine:
+
+    def __init__(self, model, X_test, y_test, idle_timeout=60.0, max_events=10000, **worker_options):
+        self.bus = EventBus(max_events)
+        self.idle_timeout = idle_timeout
+        self.worker = MonitoringWorker(
+            model, X_test, y_test,
+            bus=self.bus,
+            keep_running=self._has_subscribers,
+            **worker_options
+        )
+
+    def _has_subscribers(self):
+        return self.bus.subscriber_count(self.idle_timeout) > 0
+
+    def subscribe(self, event_types=None):
+        subscription = self.bus.subscribe(event_types)
+        self.worker.start()
+        return subscription
+
+    def poll(self, subscription):
+        # A session whose polls stalled (e.g. a throttled background tab) was
+        # pruned and may have let the worker stop; coming back restarts both
+        subscription.last_poll = time.monotonic()
+        self.bus.resubscribe(subscription)
+        self.worker.start()
+        return subscription.poll()
+
+    def set_model(self, model):
+        # Picked up by the worker at the start of its next window
+        self.worker.model = model
+
+    def unsubscribe(self, subscription):
+        # The worker winds itself down once the last subscriber is gone
+        subscription.close()
+
+    def stats(self):
+        return {
+            "running": self.worker.is_running(),
+            "subscribers": self.bus.subscriber_count(),
+            "events_published": self.bus.head,
+            "last_error": self.worker.last_error,
+        }
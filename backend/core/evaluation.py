@@ -1,11 +1,67 @@
+import pickle
+import time
+import numpy as np
 from sklearn.metrics import confusion_matrix, roc_curve, auc
+from backend.core.dedup import dedup_predict_proba
+from backend.core.profiling import profiled
 
+@profiled("evaluate")
 def evaluate(model, X_test, y_test):
-    y_pred = model.predict(X_test)
-    y_prob = model.predict_proba(X_test)[:, 1]
+    proba = dedup_predict_proba(model, X_test)
+    y_pred = model.classes_.take(np.argmax(proba, axis=1))
+    y_prob = proba[:, 1]
 
     cm = confusion_matrix(y_test, y_pred)
     fpr, tpr, _ = roc_curve(y_test, y_prob)
     roc_auc = auc(fpr, tpr)
 
-    return cm, fpr, tpr, roc_auc
\ No newline at end of file
+    return cm, fpr, tpr, roc_auc
+
+def _timed_proba(model, X):
+    start = time.perf_counter()
+    proba = model.predict_proba(X)[:, 1]
+    return proba, time.perf_counter() - start
+
+
+def cascade_report(cascade, X_test, y_test):
+    y_true = np.asarray(y_test)
+
+    full_prob, full_seconds = _timed_proba(cascade.full_model, X_test)
+    cascade.reset_stats()
+    cascade_prob, cascade_seconds = _timed_proba(cascade, X_test)
+
+    full_accuracy = float(np.mean((full_prob > 0.5) == y_true))
+    cascade_accuracy = float(np.mean((cascade_prob > 0.5) == y_true))
+
+    return {
+        "band": (cascade.low, cascade.high),
+        "short_circuit_ratio": cascade.short_circuit_ratio,
+        "full_flows_per_sec": len(X_test) / full_seconds,
+        "cascade_flows_per_sec": len(X_test) / cascade_seconds,
+        "speedup": full_seconds / cascade_seconds,
+        "full_accuracy": full_accuracy,
+        "cascade_accuracy": cascade_accuracy,
+        "accuracy_lost": full_accuracy - cascade_accuracy,
+        "full_roc_auc": float(auc(*roc_curve(y_true, full_prob)[:2])),
+        "cascade_roc_auc": float(auc(*roc_curve(y_true, cascade_prob)[:2])),
+    }
+
+def benchmark_model(model, X_test, y_test, feature_store=None, train_seconds=None):
+    proba, seconds = _timed_proba(model, X_test)
+    fpr, tpr, _ = roc_curve(y_test, proba)
+
+    if feature_store is None:
+        feature_store = X_test
+    if hasattr(feature_store, "memory_usage"):
+        store_bytes = int(feature_store.memory_usage(index=False).sum())
+    else:
+        store_bytes = int(feature_store.nbytes)
+
+    return {
+        "model_bytes": len(pickle.dumps(model)),
+        "feature_store_bytes": store_bytes,
+        "bytes_per_flow": store_bytes / max(len(feature_store), 1),
+        "train_seconds": train_seconds,
+        "flows_per_sec": len(X_test) / seconds,
+        "roc_auc": float(auc(fpr, tpr)),
+    }
@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import deque
+from itertools import islice
+
+
+class Subscription:
+
+    def __init__(self, bus, event_types=None, cursor=0):
+        self.bus = bus
+        self.event_types = set(event_types) if event_types else None
+        self.cursor = cursor
+        self.last_poll = time.monotonic()
+
+    def _filter(self, events):
+        if self.event_types is None:
+            return events
+        return [e for e in events if e.get("event_type", "window") in self.event_types]
+
+    def poll(self):
+        events, self.cursor = self.bus.events_since(self.cursor)
+        self.last_poll = time.monotonic()
+        return self._filter(events)
+
+    def wait(self, timeout=None):
+        events, self.cursor = self.bus.wait_for_events(self.cursor, timeout)
+        self.last_poll = time.monotonic()
+        return self._filter(events)
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+
+    def __init__(self, max_events=10000):
+        self._events = deque(maxlen=max_events)
+        self._next_seq = 0
+        self._subscribers = []
+        self._changed = threading.Condition()
+
+    @property
+    def head(self):
+        with self._changed:
+            return self._next_seq
+
+    def publish(self, event):
+        with self._changed:
+            self._events.append((self._next_seq, event))
+            self._next_seq += 1
+            self._changed.notify_all()
+
+    def _events_since(self, cursor):
+        if not self._events or cursor >= self._next_seq:
+            return [], self._next_seq
+        start = max(cursor - self._events[0][0], 0)
+        return [event for _, event in islice(self._events, start, None)], self._next_seq
+
+    def events_since(self, cursor):
+        with self._changed:
+            return self._events_since(cursor)
+
+    def wait_for_events(self, cursor, timeout=None):
+        with self._changed:
+            self._changed.wait_for(lambda: self._next_seq > cursor, timeout)
+            return self._events_since(cursor)
+
+    def subscribe(self, event_types=None, from_start=False):
+        with self._changed:
+            cursor = self._events[0][0] if from_start and self._events else self._next_seq
+            subscription = Subscription(self, event_types, cursor)
+            self._subscribers.append(subscription)
+            return subscription
+
+    def resubscribe(self, subscription):
+        # Returns True when an idle-pruned subscription had to be put back
+        with self._changed:
+            if subscription in self._subscribers:
+                return False
+            self._subscribers.append(subscription)
+            return True
+
+    def unsubscribe(self, subscription):
+        with self._changed:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def subscriber_count(self, idle_timeout=None):
+        with self._changed:
+            if idle_timeout is not None:
+                # Browser sessions can vanish without unsubscribing
+                cutoff = time.monotonic() - idle_timeout
+                self._subscribers = [s for s in self._subscribers if s.last_poll >= cutoff]
+            return len(self._subscribers)
@@ -0,0 +1,98 @@
+import heapq
+
+import numpy as np
+import pandas as pd
+
+HOST_COLUMNS = ["Source IP", "Destination IP"]
+
+
+def hash_hosts(hosts):
+    return pd.util.hash_array(np.asarray(hosts, dtype=object))
+
+
+class SlidingCountMin:
+
+    def __init__(self, width=4096, depth=4, slots=10, seed=0):
+        rng = np.random.default_rng(seed)
+        self.width = width
+        self.depth = depth
+        self.multipliers = rng.integers(1, 2**63, depth, dtype=np.uint64) | np.uint64(1)
+        self.slots = np.zeros((slots, depth, width))
+        self.total = np.zeros((depth, width))
+        self.current = 0
+
+    def _columns(self, keys):
+        # Multiply-shift hashing, one row per sketch level
+        mixed = keys[None, :] * self.multipliers[:, None]
+        return ((mixed >> np.uint64(32)) % np.uint64(self.width)).astype(np.intp)
+
+    def add(self, keys, weights):
+        columns = self._columns(keys)
+        for level in range(self.depth):
+            counts = np.bincount(columns[level], weights, minlength=self.width)
+            self.slots[self.current, level] += counts
+            self.total[level] += counts
+
+    def estimate(self, keys):
+        columns = self._columns(keys)
+        return self.total[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+    def advance(self):
+        self.current = (self.current + 1) % len(self.slots)
+        self.total -= self.slots[self.current]
+        self.slots[self.current] = 0.0
+
+
+class HeavyHitters:
+
+    def __init__(self, capacity=64, **sketch_options):
+        self.capacity = capacity
+        self.sketch = SlidingCountMin(**sketch_options)
+        self.candidates = {}
+
+    def update(self, hosts, weights):
+        keys = hash_hosts(hosts)
+        self.sketch.add(keys, np.asarray(weights, dtype=np.float64))
+
+        unique_keys, first = np.unique(keys, return_index=True)
+        hosts = np.asarray(hosts, dtype=object)
+        for key, row in zip(unique_keys.tolist(), first.tolist()):
+            self.candidates.setdefault(key, hosts[row])
+
+        if len(self.candidates) > self.capacity:
+            self.candidates = {key: self.candidates[key] for key, _ in self._ranked(self.capacity)}
+
+    def _ranked(self, k):
+        if not self.candidates:
+            return []
+        keys = np.fromiter(self.candidates, dtype=np.uint64, count=len(self.candidates))
+        estimates = self.sketch.estimate(keys)
+        best = heapq.nlargest(k, zip(estimates.tolist(), keys.tolist()))
+        return [(key, mass) for mass, key in best if mass > 0]
+
+    def top(self, k=3):
+        return [(self.candidates[key], mass) for key, mass in self._ranked(k)]
+
+
+class HostTracker:
+
+    def __init__(self, capacity=64, slot_windows=1, **sketch_options):
+        self.sources = HeavyHitters(capacity, **sketch_options)
+        self.destinations = HeavyHitters(capacity, **sketch_options)
+        self.slot_windows = slot_windows
+        self.windows_seen = 0
+
+    def update(self, window_hosts, risk):
+        if self.windows_seen and self.windows_seen % self.slot_windows == 0:
+            self.sources.sketch.advance()
+            self.destinations.sketch.advance()
+        self.windows_seen += 1
+
+        self.sources.update(window_hosts[HOST_COLUMNS[0]].to_numpy(), risk)
+        self.destinations.update(window_hosts[HOST_COLUMNS[1]].to_numpy(), risk)
+
+    def top(self, k=3):
+        return {
+            "top_sources": ", ".join(f"{host} ({mass:.1f})" for host, mass in self.sources.top(k)),
+            "top_destinations": ", ".join(f"{host} ({mass:.1f})" for host, mass in self.destinations.top(k)),
+        }
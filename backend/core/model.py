@@ -1,6 +1,8 @@
 import joblib
 import os
+from backend.core.profiling import profiled
 
+@profiled("load_model")
 def load_model(path):
     if os.path.exists(path):
         return joblib.load(path)
@@ -0,0 +1,129 @@
+import logging
+import threading
+import time
+from datetime import datetime
+
+from backend.core.events import EventBus
+from backend.core.sampling import SamplingIndex
+from backend.core.simulation import simulate_window, check_latency_slo
+
+logger = logging.getLogger(__name__)
+
+
+class MonitoringWorker:
+
+    def __init__(self, model, X_test, y_test, window_size=50, threshold=0.6,
+                 windows_per_sec=1.0, latency_slo_ms=None, sampler=None, bus=None, keep_running=None,
+                 hosts=None, host_tracker=None, overload=None, sinks=None, drift=None):
+        self.model = model
+        self.X_test = X_test
+        self.y_test = y_test
+        self.window_size = window_size
+        self.threshold = threshold
+        self.windows_per_sec = windows_per_sec
+        self.latency_slo_ms = latency_slo_ms
+        self.sampler = sampler if sampler is not None else SamplingIndex(y_test)
+        self.bus = bus if bus is not None else EventBus()
+        self.keep_running = keep_running
+        self.hosts = hosts
+        self.host_tracker = host_tracker
+        self.overload = overload
+        self.drift = drift
+        self.sinks = list(sinks or []) + ([drift] if drift is not None else [])
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_error = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if self.is_running():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="nids-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5.0):
+        with self._lock:
+            self._stop.set()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def _backlog(self, start, processed):
+        # Windows arrive at a fixed ingest rate; the backlog is what has
+        # arrived but not yet been scored
+        interval = 1.0 / self.windows_per_sec
+        elapsed = time.monotonic() - start
+        backlog = int(elapsed / interval) + 1 - processed
+        return backlog, elapsed - processed * interval, interval
+
+    def _run(self):
+        start = time.monotonic()
+        processed = 0
+        while not self._stop.is_set():
+            if self.keep_running is not None and not self.keep_running():
+                # Re-check under the lock so a concurrent start() is never lost
+                with self._lock:
+                    if not self.keep_running():
+                        self._thread = None
+                        return
+
+            backlog, lag, interval = self._backlog(start, processed)
+            if backlog <= 0:
+                self._stop.wait(-lag)
+                continue
+
+            if self.overload is None:
+                # Fixed-rate schedule; a slow window is not followed by a burst of catch-up windows
+                processed += backlog - 1
+            else:
+                # Bounded backlog: the oldest windows beyond the limit are shed outright
+                shed = max(backlog - self.overload.max_backlog_windows, 0)
+                self.overload.dropped_windows += shed
+                processed += shed
+                backlog -= shed
+                lag -= shed * interval
+                self.overload.update(backlog * self.window_size, lag, self.window_size, interval)
+
+            try:
+                event = simulate_window(
+                    self.model, self.X_test, self.y_test,
+                    self.window_size, self.threshold, sampler=self.sampler,
+                    hosts=self.hosts, host_tracker=self.host_tracker,
+                    overload=self.overload, sinks=self.sinks
+                )
+            except Exception as exc:
+                # The next poll restarts the worker, so the failure is reported
+                # where sessions will see it rather than only kept here
+                logger.exception("Monitoring window failed")
+                self.last_error = exc
+                self.bus.publish({
+                    "timestamp": datetime.now().strftime("%H:%M:%S"),
+                    "event_type": "error",
+                    "severity": "ERROR",
+                    "alert_triggered": True,
+                    "error": f"{type(exc).__name__}: {exc}",
+                })
+                self._stop.set()
+                break
+
+            processed += 1
+
+            if self.overload is not None:
+                event["queue_depth"] = backlog - 1
+            self.bus.publish(event)
+            degraded = check_latency_slo(event, self.latency_slo_ms)
+            if degraded:
+                self.bus.publish(degraded)
+            if self.drift is not None:
+                drifted = self.drift.check(event)
+                if drifted:
+                    self.bus.publish(drifted)
+
+    def events_since(self, cursor):
+        return self.bus.events_since(cursor)
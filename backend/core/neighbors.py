@@ -0,0 +1,185 @@
+import logging
+import os
+import threading
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import KDTree
+
+logger = logging.getLogger(__name__)
+
+
+class FlowIndex:
+
+    def __init__(self, feature_names, n_components=16, leaf_size=40, rebuild_threshold=5000,
+                 max_history=200000, path=None, seed=42):
+        self.feature_names = list(feature_names)
+        self.n_components = n_components
+        self.leaf_size = leaf_size
+        self.rebuild_threshold = rebuild_threshold
+        self.max_history = max_history
+        self.path = path
+        self.seed = seed
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._rebuilding = False
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_rebuilding"] = False
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _as_array(self, X):
+        if isinstance(X, pd.Series):
+            X = X.to_frame().T
+        if isinstance(X, pd.DataFrame):
+            X = X[self.feature_names]
+        return np.atleast_2d(np.asarray(X, dtype=np.float64))
+
+    def transform(self, X):
+        # Heavy-tailed counters are log-compressed, standardised, then
+        # randomly projected so the KD-tree works in a low dimension
+        values = self._as_array(X)
+        scaled = (np.sign(values) * np.log1p(np.abs(values)) - self.mean_) / self.scale_
+        return (scaled @ self.projection_).astype(np.float32)
+
+    def fit(self, X, labels, risk, source="test", refs=None):
+        values = self._as_array(X)
+        logged = np.sign(values) * np.log1p(np.abs(values))
+        self.mean_ = logged.mean(axis=0)
+        self.scale_ = np.where(logged.std(axis=0) > 0, logged.std(axis=0), 1.0)
+        rng = np.random.default_rng(self.seed)
+        self.projection_ = rng.standard_normal((values.shape[1], self.n_components)) / np.sqrt(self.n_components)
+
+        # The fitted reference set is permanent; scored traffic goes into a
+        # fixed-size ring so the index stops growing once it is full
+        self.base = (
+            self.transform(values),
+            np.asarray(labels, dtype=np.int8),
+            np.asarray(risk, dtype=np.float32),
+            np.full(len(values), source, dtype=object),
+            (np.arange(len(values)) if refs is None else np.asarray(refs)).astype(object),
+        )
+        self.history = (
+            np.zeros((self.max_history, self.n_components), dtype=np.float32),
+            np.zeros(self.max_history, dtype=np.int8),
+            np.zeros(self.max_history, dtype=np.float32),
+            np.empty(self.max_history, dtype=object),
+            np.empty(self.max_history, dtype=object),
+        )
+        self.written = 0
+        self._swap(self.base, KDTree(self.base[0], leaf_size=self.leaf_size), 0)
+        return self
+
+    def _swap(self, indexed, tree, written):
+        self.indexed = indexed
+        self.tree = tree
+        self.indexed_written = written
+
+    def _history_rows(self, since):
+        # Ring positions of everything written after `since`, oldest first
+        start = max(since, self.written - self.max_history)
+        return np.arange(start, self.written) % self.max_history
+
+    def add(self, X, risk, labels=None, refs=None, source="history"):
+        points = self.transform(X)[-self.max_history:]
+        count = len(points)
+        risk = np.asarray(risk, dtype=np.float32)[-count:]
+        if labels is None:
+            labels = (risk > 0.5).astype(np.int8)
+        if refs is None:
+            refs = [""] * count
+
+        with self._lock:
+            rows = np.arange(self.written, self.written + count) % self.max_history
+            values = (points, np.asarray(labels, dtype=np.int8)[-count:], risk, source,
+                      np.asarray(refs, dtype=object)[-count:])
+            for column, value in zip(self.history, values):
+                column[rows] = value
+            self.written += count
+
+            start_rebuild = (self.written - self.indexed_written >= self.rebuild_threshold
+                             and not self._rebuilding)
+            if start_rebuild:
+                self._rebuilding = True
+        if start_rebuild:
+            threading.Thread(target=self._rebuild, name="flow-index-rebuild", daemon=True).start()
+
+    def _rebuild(self):
+        try:
+            with self._lock:
+                written = self.written
+                rows = self._history_rows(0)
+                indexed = tuple(
+                    np.concatenate([base, history[rows]])
+                    for base, history in zip(self.base, self.history)
+                )
+            # The tree is built off the scoring thread and swapped in whole
+            tree = KDTree(indexed[0], leaf_size=self.leaf_size)
+            with self._lock:
+                self._swap(indexed, tree, written)
+            if self.path is not None:
+                save_flow_index(self, self.path)
+        except Exception as exc:
+            logger.exception("Rebuilding the flow index failed")
+            self.last_error = exc
+        finally:
+            self._rebuilding = False
+
+    def consume(self, X_window, probabilities, event):
+        self.add(X_window, probabilities, refs=[event["timestamp"]] * len(X_window))
+
+    def query(self, X, k=5):
+        point = self.transform(X)[:1]
+        with self._lock:
+            indexed, tree = self.indexed, self.tree
+            pending = self._history_rows(self.indexed_written)
+            pending_meta = tuple(column[pending] for column in self.history)
+
+        distances, rows = tree.query(point, k=min(k, len(indexed[0])))
+        candidates = [(d, indexed, r) for d, r in zip(distances[0], rows[0])]
+
+        # Flows added since the last rebuild are searched by brute force
+        if len(pending):
+            pending_distances = np.linalg.norm(pending_meta[0] - point, axis=1)
+            candidates += [(pending_distances[r], pending_meta, r) for r in np.argsort(pending_distances)[:k]]
+
+        results = []
+        for distance, store, row in sorted(candidates, key=lambda c: c[0])[:k]:
+            _, label, risk, source, ref = (column[row] for column in store)
+            results.append({
+                "Source": source,
+                "Reference": str(ref),
+                "Distance": round(float(distance), 4),
+                "Label": "ATTACK" if label == 1 else "BENIGN",
+                "Risk": round(float(risk), 3),
+            })
+        return results
+
+
+def load_flow_index(path):
+    if os.path.exists(path):
+        index = joblib.load(path)
+        # Indexes saved before the bounded history was introduced are rebuilt
+        if hasattr(index, "history"):
+            return index
+    return None
+
+
+def save_flow_index(index, path):
+    with index._lock:
+        # The ring is written in place, so it is copied before the lock is released
+        state = index.__getstate__()
+        state["history"] = tuple(column.copy() for column in index.history)
+    snapshot = FlowIndex.__new__(FlowIndex)
+    snapshot.__setstate__(state)
+
+    tmp_path = f"{path}.tmp"
+    joblib.dump(snapshot, tmp_path)
+    os.replace(tmp_path, path)
@@ -0,0 +1,86 @@
+import numpy as np
+
+from backend.core.hosts import HOST_COLUMNS, hash_hosts
+
+PORT_COLUMN = "Destination Port"
+HOST_BITMAP_SIZE = 1 << 20
+
+
+class OverloadController:
+
+    def __init__(self, min_sample_rate=0.1, max_lag_seconds=2.0, max_backlog_windows=20,
+                 headroom=0.8, smoothing=0.1, seed=None):
+        self.min_sample_rate = min_sample_rate
+        self.max_lag_seconds = max_lag_seconds
+        self.max_backlog_windows = max_backlog_windows
+        self.headroom = headroom
+        self.smoothing = smoothing
+        self.rng = np.random.default_rng(seed)
+
+        self.sample_rate = 1.0
+        self.queue_depth = 0
+        self.lag_seconds = 0.0
+        self.dropped_windows = 0
+
+        # Exponentially weighted sums for a fixed + per-flow scoring cost model
+        self._sums = np.zeros(5)
+        self._seen_ports = np.zeros(65536, dtype=bool)
+        self._seen_hosts = np.zeros(HOST_BITMAP_SIZE, dtype=bool)
+
+    def observe(self, flows, seconds):
+        sample = np.array([1.0, flows, seconds, flows * flows, flows * seconds])
+        self._sums += self.smoothing * (sample - self._sums)
+
+    def cost_model(self):
+        weight, n, t, nn, nt = self._sums
+        if weight == 0:
+            return 0.0, 0.0
+        n, t, nn, nt = n / weight, t / weight, nn / weight, nt / weight
+        spread = nn - n * n
+        per_flow = (nt - n * t) / spread if spread > 1e-9 else t / max(n, 1.0)
+        per_flow = max(float(per_flow), 0.0)
+        return max(float(t - per_flow * n), 0.0), per_flow
+
+    def update(self, queue_depth, lag_seconds, window_size, window_interval):
+        self.queue_depth = int(queue_depth)
+        self.lag_seconds = float(lag_seconds)
+
+        fixed, per_flow = self.cost_model()
+        if per_flow <= 0:
+            self.sample_rate = 1.0
+            return self.sample_rate
+
+        # Spend less than the arrival interval per window, and less still while behind
+        budget = window_interval * self.headroom
+        if lag_seconds > 0:
+            budget *= max(1.0 - lag_seconds / self.max_lag_seconds, 0.0)
+        affordable = (budget - fixed) / per_flow
+
+        self.sample_rate = float(np.clip(affordable / window_size, self.min_sample_rate, 1.0))
+        return self.sample_rate
+
+    def _novel(self, X_window, window_hosts):
+        novel = np.zeros(len(X_window), dtype=bool)
+
+        if PORT_COLUMN in X_window.columns:
+            ports = X_window[PORT_COLUMN].to_numpy().astype(np.int64) & 0xFFFF
+            novel |= ~self._seen_ports[ports]
+            self._seen_ports[ports] = True
+
+        if window_hosts is not None:
+            slots = (hash_hosts(window_hosts[HOST_COLUMNS[0]].to_numpy()) % HOST_BITMAP_SIZE).astype(np.intp)
+            novel |= ~self._seen_hosts[slots]
+            self._seen_hosts[slots] = True
+
+        return novel
+
+    def select(self, X_window, window_hosts=None):
+        novel = self._novel(X_window, window_hosts)
+        if self.sample_rate >= 1.0:
+            return np.ones(len(X_window), dtype=bool), None
+
+        # Flows from new hosts or ports are always kept; the rest are
+        # Bernoulli-sampled and reweighted (Horvitz-Thompson)
+        keep = novel | (self.rng.random(len(X_window)) < self.sample_rate)
+        weights = np.where(novel, 1.0, 1.0 / self.sample_rate)[keep]
+        return keep, weights
@@ -0,0 +1,213 @@
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SAMPLE_SIZE = 2048
+
+_enabled = os.environ.get("NIDS_PROFILING", "") == "1"
+_track_memory = False
+_lock = threading.Lock()
+_stages = {}
+_forwarded = None
+
+
+class StageStats:
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.bucket_counts = [0] * len(DURATION_BUCKETS)
+        self.memory_delta_bytes = 0
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+
+    def add(self, seconds, memory_delta):
+        self.count += 1
+        self.total_seconds += seconds
+        self.memory_delta_bytes += memory_delta
+        self.samples.append(seconds)
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+
+def enable(track_memory=False):
+    global _enabled, _track_memory
+    _track_memory = track_memory
+    if track_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def is_tracking_memory():
+    return _track_memory
+
+
+def reset():
+    with _lock:
+        _stages.clear()
+
+
+def forward_records():
+    # In a worker process: keep raw timings for the parent instead of aggregating them here
+    global _forwarded
+    _forwarded = []
+
+
+def drain_forwarded():
+    with _lock:
+        records = list(_forwarded or ())
+        if _forwarded:
+            _forwarded.clear()
+    return records
+
+
+def record(name, seconds, memory_delta=0):
+    with _lock:
+        if _forwarded is not None:
+            _forwarded.append((name, seconds, memory_delta))
+            return
+        stats = _stages.get(name)
+        if stats is None:
+            stats = _stages[name] = StageStats()
+        stats.add(seconds, memory_delta)
+
+
+def _memory_now():
+    return tracemalloc.get_traced_memory()[0] if _track_memory else 0
+
+
+@contextmanager
+def stage(name):
+    if not _enabled:
+        yield
+        return
+    memory_start = _memory_now()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start, _memory_now() - memory_start)
+
+
+def profiled(name):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def stage_summary():
+    with _lock:
+        snapshot = [(name, stats.count, stats.total_seconds, stats.memory_delta_bytes, list(stats.samples))
+                    for name, stats in _stages.items()]
+
+    summary = []
+    for name, count, total, memory, samples in sorted(snapshot):
+        p50, p95, p99 = np.percentile(samples, [50, 95, 99]) * 1000 if samples else (0.0, 0.0, 0.0)
+        summary.append({
+            "stage": name,
+            "calls": count,
+            "mean_ms": round(total / count * 1000, 3) if count else 0.0,
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "memory_delta_kb": round(memory / 1024, 1),
+        })
+    return summary
+
+
+def render_prometheus():
+    with _lock:
+        snapshot = [(name, stats.count, stats.total_seconds, stats.memory_delta_bytes, list(stats.bucket_counts))
+                    for name, stats in _stages.items()]
+
+    lines = [
+        "# HELP nids_stage_duration_seconds Time spent in each pipeline stage.",
+        "# TYPE nids_stage_duration_seconds histogram",
+    ]
+    for name, count, total, _, buckets in sorted(snapshot):
+        cumulative = 0
+        for bound, bucket_count in zip(DURATION_BUCKETS, buckets):
+            cumulative += bucket_count
+            lines.append(f'nids_stage_duration_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'nids_stage_duration_seconds_bucket{{stage="{name}",le="+Inf"}} {count}')
+        lines.append(f'nids_stage_duration_seconds_sum{{stage="{name}"}} {total}')
+        lines.append(f'nids_stage_duration_seconds_count{{stage="{name}"}} {count}')
+
+    lines.append("# HELP nids_stage_memory_delta_bytes Net traced memory allocated by each stage.")
+    lines.append("# TYPE nids_stage_memory_delta_bytes gauge")
+    for name, _, _, memory, _ in sorted(snapshot):
+        lines.append(f'nids_stage_memory_delta_bytes{{stage="{name}"}} {memory}')
+
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.rstrip("/") not in ("", "/metrics"):
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_file_writer(path, interval=15.0):
+    # For node_exporter's textfile collector: rewritten on a timer, independent of page renders
+    stop = threading.Event()
+
+    def run():
+        while True:
+            try:
+                write_prometheus(path)
+            except OSError:
+                pass
+            if stop.wait(interval):
+                return
+
+    threading.Thread(target=run, name="nids-metrics-file", daemon=True).start()
+    return stop
+
+
+def start_metrics_server(port=9108, host="127.0.0.1"):
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="nids-metrics", daemon=True)
+    thread.start()
+    return server
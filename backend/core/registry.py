@@ -0,0 +1,236 @@
+import argparse
+import errno
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import joblib
+
+from backend.core.model import load_features, load_model
+
+ACTIVE_FILE = "ACTIVE"
+HISTORY_FILE = "HISTORY"
+VERSIONS_DIR = "versions"
+
+logger = logging.getLogger(__name__)
+
+
+class ModelVersion:
+
+    def __init__(self, version, model, feature_names, cascade, metadata):
+        self.version = version
+        self.model = model
+        self.feature_names = feature_names
+        self.cascade = cascade
+        self.metadata = metadata
+
+    @property
+    def scoring_model(self):
+        return self.cascade or self.model
+
+
+class ModelRegistry:
+
+    def __init__(self, root):
+        self.root = root
+        self.versions_dir = os.path.join(root, VERSIONS_DIR)
+
+    def versions(self):
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(name for name in os.listdir(self.versions_dir) if name.startswith("v"))
+
+    def active_version(self):
+        try:
+            with open(os.path.join(self.root, ACTIVE_FILE)) as handle:
+                return handle.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def history(self):
+        try:
+            with open(os.path.join(self.root, HISTORY_FILE)) as handle:
+                return [line.strip() for line in handle if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def _write_atomic(self, name, text):
+        tmp = os.path.join(self.root, f".{name}.{uuid.uuid4().hex}")
+        with open(tmp, "w") as handle:
+            handle.write(text)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp, os.path.join(self.root, name))
+
+    def publish(self, model, feature_names, cascade=None, metadata=None, activate=True):
+        os.makedirs(self.versions_dir, exist_ok=True)
+
+        # Artifacts are written to a scratch directory and renamed into place,
+        # so a version directory is either complete or absent
+        staging = os.path.join(self.root, f".staging-{uuid.uuid4().hex}")
+        os.makedirs(staging)
+        joblib.dump(model, os.path.join(staging, "model.pkl"))
+        joblib.dump(list(feature_names), os.path.join(staging, "features.pkl"))
+        if cascade is not None:
+            joblib.dump(cascade, os.path.join(staging, "cascade.pkl"))
+
+        while True:
+            existing = self.versions()
+            version = f"v{int(existing[-1][1:]) + 1 if existing else 1:04d}"
+            with open(os.path.join(staging, "metadata.json"), "w") as handle:
+                json.dump({
+                    "version": version,
+                    "created": datetime.now().isoformat(timespec="seconds"),
+                    "n_features": len(feature_names),
+                    "cascade": cascade is not None,
+                    **(metadata or {}),
+                }, handle, indent=2, default=str)
+            try:
+                os.rename(staging, os.path.join(self.versions_dir, version))
+                break
+            except OSError as exc:
+                # Another publisher took this number; anything else is a real failure
+                if exc.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+                    raise
+
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version):
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version: {version}")
+        self._write_atomic(ACTIVE_FILE, version + "\n")
+        with open(os.path.join(self.root, HISTORY_FILE), "a") as handle:
+            handle.write(version + "\n")
+
+    def rollback(self):
+        # HISTORY is an activation stack: rolling back pops the active entry
+        # and re-activates the one below it, so repeated rollbacks keep going back
+        active = self.active_version()
+        stack = self.history()
+        while stack and stack[-1] == active:
+            stack.pop()
+        if not stack:
+            raise ValueError("No earlier model version to roll back to")
+        version = stack[-1]
+        self._write_atomic(HISTORY_FILE, "".join(entry + "\n" for entry in stack))
+        self._write_atomic(ACTIVE_FILE, version + "\n")
+        return version
+
+    def load(self, version=None):
+        version = version or self.active_version()
+        if version is None:
+            return None
+        path = os.path.join(self.versions_dir, version)
+        with open(os.path.join(path, "metadata.json")) as handle:
+            metadata = json.load(handle)
+        return ModelVersion(
+            version,
+            load_model(os.path.join(path, "model.pkl")),
+            load_features(os.path.join(path, "features.pkl")),
+            load_model(os.path.join(path, "cascade.pkl")),
+            metadata,
+        )
+
+
+class ModelWatcher:
+
+    def __init__(self, registry, prepare, poll_seconds=5.0, retire=None, grace_seconds=60.0):
+        self.registry = registry
+        self.prepare = prepare
+        self.poll_seconds = poll_seconds
+        self.retire = retire
+        self.grace_seconds = grace_seconds
+
+        self.listeners = []
+        self.last_error = None
+        self._retiring = []
+        self._stop = threading.Event()
+        self._thread = None
+
+        # The first version is loaded synchronously so callers always have one
+        loaded = registry.load()
+        self.version = loaded.version
+        self.current = prepare(loaded)
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def check(self):
+        version = self.registry.active_version()
+        if version is None or version == self.version:
+            return False
+
+        # Loading and warming happen off to the side; callers keep using the
+        # old resources until the single reference swap below
+        loaded = self.registry.load(version)
+        prepared = self.prepare(loaded)
+
+        previous = self.current
+        self.current = prepared
+        self.version = version
+        self._retiring.append((time.monotonic() + self.grace_seconds, previous))
+
+        for callback in self.listeners:
+            callback(loaded, prepared)
+        return True
+
+    def _retire_expired(self):
+        now = time.monotonic()
+        while self._retiring and self._retiring[0][0] <= now:
+            _, resources = self._retiring.pop(0)
+            if self.retire is not None:
+                self.retire(resources)
+
+    def _run(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.check()
+            except Exception as exc:
+                # A broken version never replaces a working one
+                logger.exception("Loading the active model version failed")
+                self.last_error = exc
+            try:
+                self._retire_expired()
+            except Exception as exc:
+                logger.exception("Retiring a replaced model version failed")
+                self.last_error = exc
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and switch versions in a model registry.")
+    parser.add_argument("root", help="registry directory")
+    parser.add_argument("command", choices=["list", "activate", "rollback"])
+    parser.add_argument("version", nargs="?", help="version to activate")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == "activate":
+        registry.activate(args.version)
+    elif args.command == "rollback":
+        registry.rollback()
+
+    active = registry.active_version()
+    for version in registry.versions():
+        marker = "*" if version == active else " "
+        with open(os.path.join(registry.versions_dir, version, "metadata.json")) as handle:
+            metadata = json.load(handle)
+        print(f"{marker} {version}  {metadata.get('created', '')}  roc_auc={metadata.get('roc_auc', 'n/a')}")
+
+
+if __name__ == "__main__":
+    main()
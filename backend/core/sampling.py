@@ -0,0 +1,65 @@
+import numpy as np
+
+
+def constant_scenario(attack_ratio):
+    def scenario(window_number):
+        return attack_ratio
+    return scenario
+
+
+def ramp_scenario(start=0.05, peak=0.95, ramp_windows=20, hold_windows=10):
+    # Quiet baseline ramping into a DDoS burst, holding at peak, then repeating
+    period = ramp_windows + hold_windows
+
+    def scenario(window_number):
+        step = window_number % period
+        if step >= ramp_windows:
+            return peak
+        return start + (peak - start) * step / max(ramp_windows, 1)
+    return scenario
+
+
+class SamplingIndex:
+
+    def __init__(self, y, seed=None):
+        labels = np.asarray(y)
+        self.size = len(labels)
+        self.benign_idx = np.flatnonzero(labels == 0)
+        self.attack_idx = np.flatnonzero(labels == 1)
+        self.base_attack_ratio = len(self.attack_idx) / max(self.size, 1)
+        self.scenario = None
+        self.reseed(seed)
+
+    def reseed(self, seed=None):
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.window_number = 0
+
+    def set_scenario(self, scenario):
+        self.scenario = scenario
+        self.window_number = 0
+
+    def draw_packet(self):
+        return int(self.rng.integers(0, self.size))
+
+    def _draw_from(self, pool, count):
+        count = min(count, len(pool))
+        # Generator.choice uses Floyd's algorithm here, so this is O(count)
+        return pool[self.rng.choice(len(pool), count, replace=False)]
+
+    def draw_window(self, window_size, attack_ratio=None):
+        if attack_ratio is None and self.scenario is not None:
+            attack_ratio = self.scenario(self.window_number)
+        self.window_number += 1
+
+        if attack_ratio is None:
+            return self.rng.choice(self.size, min(window_size, self.size), replace=False)
+
+        attack_ratio = min(max(float(attack_ratio), 0.0), 1.0)
+        attack_count = int(round(window_size * attack_ratio))
+        indices = np.concatenate([
+            self._draw_from(self.attack_idx, attack_count),
+            self._draw_from(self.benign_idx, window_size - attack_count),
+        ])
+        self.rng.shuffle(indices)
+        return indices
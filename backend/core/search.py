@@ -0,0 +1,103 @@
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import ParameterSampler, StratifiedKFold
+
+from backend.core.evaluation import _timed_proba, evaluate
+
+PARAM_GRID = {
+    "n_estimators": [25, 50, 100, 200],
+    "max_depth": [8, 12, 20, None],
+    "max_features": ["sqrt", "log2", 0.3],
+    "min_samples_leaf": [1, 5, 20],
+}
+
+# Accuracy is maximised, the two cost measures are minimised
+OBJECTIVES = {"roc_auc": 1, "latency_us": -1, "model_bytes": -1}
+METRIC_FIELDS = {"roc_auc", "roc_auc_std", "latency_us", "model_bytes", "cv_seconds", "pareto"}
+
+_X = None
+_y = None
+
+
+def _init_worker(X, y):
+    # The training split is shipped to each worker once, not once per candidate
+    global _X, _y
+    _X, _y = X, y
+
+
+def _evaluate_candidate(params, n_splits, seed, deadline, latency_rows):
+    folds = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    aucs, latencies, sizes = [], [], []
+    start = time.perf_counter()
+
+    for train_index, test_index in folds.split(_X, _y):
+        if time.time() > deadline:
+            return None
+        X_fold, y_fold = _X.iloc[train_index], _y.iloc[train_index]
+        X_held, y_held = _X.iloc[test_index], _y.iloc[test_index]
+
+        model = RandomForestClassifier(**params, random_state=seed, n_jobs=1)
+        model.fit(X_fold, y_fold)
+
+        _, _, _, roc_auc = evaluate(model, X_held, y_held)
+        _, seconds = _timed_proba(model, X_held.iloc[:latency_rows])
+
+        aucs.append(roc_auc)
+        latencies.append(seconds / min(latency_rows, len(X_held)))
+        sizes.append(len(pickle.dumps(model)))
+
+    return {
+        **params,
+        "roc_auc": float(np.mean(aucs)),
+        "roc_auc_std": float(np.std(aucs)),
+        "latency_us": float(np.median(latencies) * 1e6),
+        "model_bytes": int(np.mean(sizes)),
+        "cv_seconds": time.perf_counter() - start,
+    }
+
+
+def pareto_front(results):
+    scores = np.array([[sign * r[name] for name, sign in OBJECTIVES.items()] for r in results])
+    optimal = np.ones(len(results), dtype=bool)
+    for i, score in enumerate(scores):
+        dominated = np.all(scores >= score, axis=1) & np.any(scores > score, axis=1)
+        optimal[i] = not dominated.any()
+    return optimal
+
+
+def search_forest(X, y, param_grid=PARAM_GRID, n_candidates=24, n_splits=3, time_budget=600.0,
+                  n_jobs=None, latency_rows=5000, seed=42):
+    candidates = list(ParameterSampler(param_grid, n_candidates, random_state=seed))
+    deadline = time.time() + time_budget
+
+    results = []
+    with ProcessPoolExecutor(n_jobs or os.cpu_count(), initializer=_init_worker, initargs=(X, y)) as pool:
+        futures = [
+            pool.submit(_evaluate_candidate, params, n_splits, seed, deadline, latency_rows)
+            for params in candidates
+        ]
+        # Candidates that have not started when the budget runs out are skipped,
+        # and running ones stop before their next fold
+        for future in as_completed(futures):
+            result = future.result()
+            if result is not None:
+                results.append(result)
+
+    if results:
+        for result, optimal in zip(results, pareto_front(results)):
+            result["pareto"] = bool(optimal)
+    return sorted(results, key=lambda r: -r["roc_auc"])
+
+
+def select_configuration(results, max_auc_drop=0.005):
+    # The cheapest Pareto-optimal forest that detects almost as well as the best one
+    front = [r for r in results if r["pareto"]]
+    best_auc = max(r["roc_auc"] for r in front)
+    eligible = [r for r in front if r["roc_auc"] >= best_auc - max_auc_drop]
+    chosen = min(eligible, key=lambda r: (r["latency_us"], r["model_bytes"]))
+    return {name: value for name, value in chosen.items() if name not in METRIC_FIELDS}
@@ -0,0 +1,384 @@
+import argparse
+import json
+import os
+import shutil
+import socket
+import socketserver
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from backend.core.batch import HEADER, batch_header, iter_batch_file, parse_header, score_batch
+from backend.core.dedup import row_keys
+from backend.core.hosts import hash_hosts
+from backend.core.model import load_features, load_model
+from backend.core.simulation import severity_for
+from backend.core.synthetic import SyntheticFlowGenerator, load_generator
+
+MAGIC = b"NIDS"
+KIND_SCORE = 1
+KIND_SHUTDOWN = 2
+
+# magic, kind, window id; a score request is followed by one batch frame (backend.core.batch)
+REQUEST = struct.Struct("<4sBI")
+# magic, window id, rows, attack count, risk sum, scoring seconds; followed by rows float32 probabilities
+RESULT = struct.Struct("<4sIIIdd")
+
+SHARD_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def parse_address(address):
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+def _recv_into(sock, view):
+    received = 0
+    while received < len(view):
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            raise ConnectionError("Connection closed mid-frame")
+        received += count
+
+
+def recv_exact(sock, n_bytes):
+    buffer = bytearray(n_bytes)
+    _recv_into(sock, memoryview(buffer))
+    return buffer
+
+
+def recv_batch(sock):
+    # The frame lands in one buffer that the scorer reads in place
+    header = recv_exact(sock, HEADER.size)
+    frame = bytearray(parse_header(header)["nbytes"])
+    frame[:HEADER.size] = header
+    _recv_into(sock, memoryview(frame)[HEADER.size:])
+    return frame
+
+
+def flow_keys(values, hosts=None):
+    # A flow and its reply share a host pair, so the pair hash is symmetric;
+    # without host columns, identical feature rows still land together
+    if hosts is not None:
+        pairs = np.asarray(hosts)
+        return hash_hosts(pairs[:, 0]) ^ hash_hosts(pairs[:, 1])
+    return row_keys(np.asarray(values, dtype=np.float64)).view(np.uint64).reshape(-1, 2)[:, 0]
+
+
+def shard_of(keys, n_shards):
+    # Multiply-shift so neighbouring keys do not all fall on one shard
+    return (((keys * SHARD_MULTIPLIER) >> np.uint64(32)) % np.uint64(n_shards)).astype(np.intp)
+
+
+class _ScoringHandler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        server = self.server
+        while True:
+            try:
+                envelope = recv_exact(self.request, REQUEST.size)
+            except ConnectionError:
+                return
+            magic, kind, window_id = REQUEST.unpack(envelope)
+            if magic != MAGIC:
+                raise ValueError(f"Bad frame from coordinator: magic={magic!r}")
+            if kind == KIND_SHUTDOWN:
+                server.stopping = True
+                return
+
+            frame = recv_batch(self.request)
+            start = time.perf_counter()
+            probabilities = score_batch(server.model, frame, server.feature_names).astype(np.float32)
+            seconds = time.perf_counter() - start
+            n_rows = len(probabilities)
+
+            attack_count = int(np.count_nonzero(probabilities > 0.5))
+            self.request.sendall(
+                RESULT.pack(MAGIC, window_id, n_rows, attack_count, float(probabilities.sum(dtype=np.float64)), seconds)
+                + probabilities.tobytes()
+            )
+
+
+class _TCPScoringServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class _UnixScoringServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def serve_worker(address, model, feature_names):
+    family, target = parse_address(address)
+    if family == socket.AF_UNIX:
+        if os.path.exists(target):
+            os.remove(target)
+        server = _UnixScoringServer(target, _ScoringHandler)
+    else:
+        server = _TCPScoringServer(target, _ScoringHandler)
+
+    server.model = model
+    server.feature_names = list(feature_names)
+    server.stopping = False
+    server.timeout = 0.5
+    with server:
+        while not server.stopping:
+            server.handle_request()
+
+
+class ShardCoordinator:
+
+    def __init__(self, addresses, feature_names, threshold=0.6, connect_timeout=30.0):
+        self.addresses = list(addresses)
+        self.feature_names = list(feature_names)
+        self.threshold = threshold
+        self.sockets = [self._connect(address, connect_timeout) for address in self.addresses]
+        self.windows = 0
+        self.flows = 0
+
+    def _connect(self, address, timeout):
+        family, target = parse_address(address)
+        deadline = time.monotonic() + timeout
+        while True:
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            try:
+                sock.connect(target)
+                break
+            except OSError:
+                sock.close()
+                # Workers may still be loading their model
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.1)
+        if family == socket.AF_INET:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def close(self, shutdown_workers=False):
+        for sock in self.sockets:
+            try:
+                if shutdown_workers:
+                    sock.sendall(REQUEST.pack(MAGIC, KIND_SHUTDOWN, 0))
+                sock.close()
+            except OSError:
+                pass
+        self.sockets = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _as_values(self, X_window):
+        if isinstance(X_window, pd.DataFrame):
+            X_window = X_window[self.feature_names]
+        return np.ascontiguousarray(X_window, dtype=np.float32)
+
+    def score_window(self, X_window, hosts=None):
+        values = self._as_values(X_window)
+        n_shards = len(self.sockets)
+        shards = shard_of(flow_keys(values, hosts), n_shards)
+        order = np.argsort(shards, kind="stable")
+        bounds = np.searchsorted(shards[order], np.arange(n_shards + 1))
+        window_id = self.windows & 0xFFFFFFFF
+
+        # Every shard is sent before any reply is read, so workers score in parallel
+        for shard, sock in enumerate(self.sockets):
+            rows = order[bounds[shard]:bounds[shard + 1]]
+            sock.sendall(REQUEST.pack(MAGIC, KIND_SCORE, window_id) + batch_header(len(rows), self.feature_names))
+            sock.sendall(values[rows])
+
+        probabilities = np.empty(len(values), dtype=np.float32)
+        shard_stats = []
+        for shard, sock in enumerate(self.sockets):
+            magic, reply_id, n_rows, attack_count, risk_sum, seconds = RESULT.unpack(recv_exact(sock, RESULT.size))
+            if magic != MAGIC or reply_id != window_id:
+                raise ConnectionError(f"Out-of-order reply from {self.addresses[shard]}")
+            rows = order[bounds[shard]:bounds[shard + 1]]
+            probabilities[rows] = np.frombuffer(recv_exact(sock, n_rows * 4), dtype=np.float32)
+            shard_stats.append((n_rows, attack_count, risk_sum, seconds))
+
+        self.windows += 1
+        self.flows += len(values)
+        return probabilities, shard_stats
+
+    def predict_proba(self, X):
+        probabilities, _ = self.score_window(X)
+        probabilities = probabilities.astype(np.float64)
+        return np.column_stack([1.0 - probabilities, probabilities])
+
+    def analyze_window(self, X_window, hosts=None, sinks=None):
+        start = time.perf_counter()
+        probabilities, shard_stats = self.score_window(X_window, hosts)
+        end = time.perf_counter()
+
+        # Global window statistics are merged from the per-shard partial sums
+        flows = sum(s[0] for s in shard_stats)
+        attack_count = sum(s[1] for s in shard_stats)
+        mean_risk = sum(s[2] for s in shard_stats) / flows if flows else 0.0
+        total_seconds = end - start
+
+        event = {
+            "timestamp": datetime.now().strftime("%H:%M:%S"),
+            "event_type": "window",
+            "window_size": int(flows),
+            "attack_count": int(attack_count),
+            "mean_risk_score": round(mean_risk, 2),
+            "severity": severity_for(mean_risk),
+            "alert_triggered": bool(mean_risk > self.threshold),
+            "score_ms": round(max((s[3] for s in shard_stats), default=0.0) * 1000, 3),
+            "latency_ms": round(total_seconds * 1000, 3),
+            "flows_scored": int(flows),
+            "flows_per_sec": round(flows / total_seconds, 1) if total_seconds > 0 else 0.0,
+            "shards": len(shard_stats),
+            "max_shard_flows": int(max((s[0] for s in shard_stats), default=0)),
+        }
+
+        for sink in sinks or ():
+            sink.consume(X_window, probabilities, event)
+        return event
+
+
+def spawn_workers(n_workers, model_path, feature_path, socket_dir):
+    # Each worker is a separate interpreter, so scoring is not bound by one GIL
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+
+    addresses, processes = [], []
+    for i in range(n_workers):
+        address = f"unix:{os.path.join(socket_dir, f'worker-{i}.sock')}"
+        processes.append(subprocess.Popen(
+            [sys.executable, "-m", "backend.core.sharding", "worker", "--listen", address,
+             "--model", model_path, "--features", feature_path],
+            env=env,
+        ))
+        addresses.append(address)
+    return addresses, processes
+
+
+def _replay_values(args, feature_names):
+    if args.batches is not None:
+        return np.concatenate(list(iter_batch_file(args.batches, feature_names)))[:args.flows], None
+    if args.data is None or args.synthetic:
+        # Flows drawn from the fitted marginals and correlations, so duplicate
+        # rates, tree paths and cache behaviour resemble real traffic
+        generator = _generator(args, feature_names)
+        return generator.sample(args.flows)[0].to_numpy(), None
+    df = pd.read_csv(args.data, nrows=args.flows)
+    df.columns = df.columns.str.strip()
+    df = df.replace([np.inf, -np.inf], np.nan).dropna(subset=feature_names)
+    hosts = df[["Source IP", "Destination IP"]].to_numpy() if {"Source IP", "Destination IP"} <= set(df.columns) else None
+    return df[feature_names].to_numpy(np.float32), hosts
+
+
+def _generator(args, feature_names):
+    if args.data is not None:
+        df = pd.read_csv(args.data, low_memory=False)
+        df.columns = df.columns.str.strip()
+        df = df.replace([np.inf, -np.inf], np.nan).dropna(subset=feature_names)
+        return SyntheticFlowGenerator.fit(df, feature_names, seed=args.seed)
+
+    generator = load_generator(args.generator, args.seed)
+    if generator is None:
+        raise SystemExit(f"No flow source: pass --data or --batches, or fit a generator into {args.generator}")
+    if generator.feature_names != list(feature_names):
+        raise SystemExit(f"{args.generator} was fitted on a different feature list")
+    return generator
+
+
+def _replay(coordinator, values, hosts, window_size):
+    start = time.perf_counter()
+    for offset in range(0, len(values), window_size):
+        window_hosts = hosts[offset:offset + window_size] if hosts is not None else None
+        yield coordinator.analyze_window(values[offset:offset + window_size], window_hosts)
+    yield {"elapsed": time.perf_counter() - start}
+
+
+def benchmark(args, feature_names, values, hosts):
+    results = []
+    for n_workers in args.workers:
+        socket_dir = tempfile.mkdtemp(prefix="nids-shards-")
+        addresses, processes = spawn_workers(n_workers, args.model, args.features, socket_dir)
+        try:
+            coordinator = ShardCoordinator(addresses, feature_names)
+            # One warm-up window so model loading is not counted
+            coordinator.analyze_window(values[:args.window], hosts[:args.window] if hosts is not None else None)
+            *events, timing = _replay(coordinator, values, hosts, args.window)
+            coordinator.close(shutdown_workers=True)
+        finally:
+            for process in processes:
+                try:
+                    process.wait(10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+            shutil.rmtree(socket_dir, ignore_errors=True)
+
+        throughput = len(values) / timing["elapsed"]
+        results.append({
+            "workers": n_workers,
+            "windows": len(events),
+            "flows_per_sec": round(throughput, 1),
+            "speedup": round(throughput / results[0]["flows_per_sec"], 2) if results else 1.0,
+            "mean_latency_ms": round(float(np.mean([e["latency_ms"] for e in events])), 3),
+        })
+        print(json.dumps(results[-1]), flush=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded scoring over local or remote worker processes.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    worker = commands.add_parser("worker", help="serve a scoring shard")
+    worker.add_argument("--listen", required=True, help="host:port or unix:/path")
+
+    replay = commands.add_parser("replay", help="replay a flow stream through running workers")
+    replay.add_argument("--connect", nargs="+", required=True, help="worker addresses")
+    replay.add_argument("--threshold", type=float, default=0.6)
+
+    bench = commands.add_parser("bench", help="spawn local workers and report throughput by worker count")
+    bench.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+
+    for command in (worker, replay, bench):
+        command.add_argument("--model", default="backend/model/rf_model.pkl")
+        command.add_argument("--features", default="backend/model/rf_features.pkl")
+    for command in (replay, bench):
+        command.add_argument("--data", help="CICIDS-style CSV to replay (default: flows from --generator)")
+        command.add_argument("--batches", help="batch file to replay, as written by backend.core.batch")
+        command.add_argument("--synthetic", action="store_true",
+                             help="sample --flows synthetic flows fitted on --data instead of replaying its rows")
+        command.add_argument("--generator", default="backend/model/rf_synthetic.pkl",
+                             help="saved synthetic flow generator, used when no --data is given")
+        command.add_argument("--flows", type=int, default=200000)
+        command.add_argument("--window", type=int, default=5000)
+        command.add_argument("--seed", type=int, default=42)
+
+    args = parser.parse_args()
+    feature_names = list(load_features(args.features))
+
+    if args.command == "worker":
+        serve_worker(args.listen, load_model(args.model), feature_names)
+        return
+
+    values, hosts = _replay_values(args, feature_names)
+    if args.command == "bench":
+        benchmark(args, feature_names, values, hosts)
+        return
+
+    with ShardCoordinator(args.connect, feature_names, args.threshold) as coordinator:
+        for event in _replay(coordinator, values, hosts, args.window):
+            print(json.dumps(event), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,141 @@
+import time
 import numpy as np
 from datetime import datetime
+from backend.core.dedup import dedup_predict_proba
+from backend.core.profiling import profiled, stage
 
-def get_random_packet(X_test, y_test):
-    idx = np.random.randint(0, len(X_test))
+def get_random_packet(X_test, y_test, sampler=None):
+    if sampler is not None:
+        idx = sampler.draw_packet()
+    else:
+        idx = np.random.randint(0, len(X_test))
     return X_test.iloc[idx], y_test.iloc[idx]
 
+@profiled("predict_packet")
 def predict(model, packet):
     return model.predict([packet])[0]
 
-def simulate_window(model, X_test, y_test, window_size=50, threshold=0.6):
+@profiled("simulate_window")
+def simulate_window(model, X_test, y_test, window_size=50, threshold=0.6,
+                    sampler=None, attack_ratio=None, hosts=None, host_tracker=None,
+                    overload=None, sinks=None):
 
-    indices = np.random.choice(len(X_test), window_size, replace=False)
+    sample_start = time.perf_counter()
+
+    if sampler is not None:
+        indices = sampler.draw_window(window_size, attack_ratio)
+    else:
+        indices = np.random.default_rng().choice(len(X_test), window_size, replace=False)
 
     X_window = X_test.iloc[indices]
+    window_hosts = hosts.iloc[indices] if hosts is not None else None
 
-    probabilities = model.predict_proba(X_window)[:, 1]
-    mean_risk = float(np.mean(probabilities))
+    weights = None
+    if overload is not None:
+        keep, weights = overload.select(X_window, window_hosts)
+        if weights is not None:
+            X_window = X_window[keep]
+            window_hosts = window_hosts[keep] if window_hosts is not None else None
 
-    predictions = (probabilities > 0.5).astype(int)
-    attack_count = int(np.sum(predictions == 1))
+    event = analyze_window(
+        model, X_window, threshold, time.perf_counter() - sample_start,
+        window_hosts, host_tracker, weights, len(indices), sinks
+    )
+
+    if overload is not None:
+        overload.observe(event["flows_scored"], (event["score_ms"] + event["classify_ms"]) / 1000)
+
+    return event
 
+def severity_for(mean_risk):
     if mean_risk<0.4:
-        severity = "LOW"
+        return "LOW"
     elif mean_risk<0.6:
-        severity = "MEDIUM"
-    else:        
-        severity = "HIGH"
+        return "MEDIUM"
+    else:
+        return "HIGH"
+
+def analyze_window(model, X_window, threshold=0.6, sample_seconds=0.0,
+                   window_hosts=None, host_tracker=None, weights=None, window_size=None,
+                   sinks=None):
+
+    score_start = time.perf_counter()
+    flows_scored = len(X_window)
+    # Load shedding can keep no flows at all; the model is not called for those windows
+    if flows_scored:
+        with stage("window_scoring"):
+            probabilities = dedup_predict_proba(model, X_window)[:, 1]
+    else:
+        probabilities = np.zeros(0)
+    classify_start = time.perf_counter()
+
+    if window_size is None:
+        window_size = flows_scored
+
+    predictions = (probabilities > 0.5).astype(int)
+
+    sampling = {"sampled": weights is not None}
+    if weights is None:
+        mean_risk = float(np.mean(probabilities)) if flows_scored else 0.0
+        attack_count = int(np.sum(predictions == 1))
+    else:
+        # Horvitz-Thompson estimates over the full window, with a normal-approximation interval
+        mean_risk = float(np.sum(weights * probabilities) / window_size)
+        attack_count = int(round(np.sum(weights * predictions)))
+        margin = 1.96 * np.sqrt(np.sum(weights * (weights - 1) * probabilities ** 2)) / window_size
+        sampling.update({
+            "sample_rate": round(flows_scored / window_size, 3),
+            "risk_ci_low": round(max(mean_risk - float(margin), 0.0), 3),
+            "risk_ci_high": round(min(mean_risk + float(margin), 1.0), 3),
+        })
+
+    severity = severity_for(mean_risk)
 
     alert_triggered = bool(mean_risk > threshold)
 
+    top_hosts = {}
+    if host_tracker is not None and window_hosts is not None:
+        host_tracker.update(window_hosts, probabilities if weights is None else probabilities * weights)
+        top_hosts = host_tracker.top()
+
+    end = time.perf_counter()
+    total_seconds = sample_seconds + (end - score_start)
+
     event = {
         "timestamp": datetime.now().strftime("%H:%M:%S"),
+        "event_type": "window",
         "window_size": int(window_size),
         "attack_count": attack_count,
         "mean_risk_score": round(mean_risk, 2),
         "severity": severity,
-        "alert_triggered": alert_triggered
+        "alert_triggered": alert_triggered,
+        "sample_ms": round(sample_seconds * 1000, 3),
+        "score_ms": round((classify_start - score_start) * 1000, 3),
+        "classify_ms": round((end - classify_start) * 1000, 3),
+        "latency_ms": round(total_seconds * 1000, 3),
+        "flows_scored": int(flows_scored),
+        "flows_per_sec": round(flows_scored / total_seconds, 1) if total_seconds > 0 else 0.0,
+        **sampling,
+        **top_hosts,
     }
 
+    # Downstream consumers of scored flows run after the latency measurement
+    for sink in sinks or ():
+        sink.consume(X_window, probabilities, event)
+
     return event
+
+def check_latency_slo(event, slo_ms):
+    if slo_ms is None or event.get("latency_ms", 0.0) <= slo_ms:
+        return None
+
+    return {
+        "timestamp": event["timestamp"],
+        "event_type": "performance",
+        "window_size": event["window_size"],
+        "severity": "DEGRADED",
+        "alert_triggered": True,
+        "latency_ms": event["latency_ms"],
+        "flows_per_sec": event["flows_per_sec"],
+        "slo_ms": float(slo_ms),
+    }
@@ -0,0 +1,243 @@
+import json
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from backend.core.batch import schema_id
+from backend.core.data import clean_flows
+from backend.core.hosts import HOST_COLUMNS
+from backend.core.profiling import profiled
+
+STORE_FORMAT = 1
+HOST_DTYPE = np.dtype("S39")
+
+
+def _source_signature(csv_path, feature_names):
+    stat = os.stat(csv_path)
+    return {
+        "format": STORE_FORMAT,
+        "source": os.path.abspath(csv_path),
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "feature_names": list(feature_names),
+    }
+
+
+@profiled("build_flow_store")
+def build_flow_store(csv_path, store_dir, feature_names, chunk_rows=100000):
+    # One streaming pass over the CSV, cleaned by the same clean_flows as load_dataset, into
+    # fixed-width row files so any row sits at row * row_bytes
+    os.makedirs(store_dir, exist_ok=True)
+    feature_names = list(feature_names)
+    labels, n_rows, has_hosts = [], 0, None
+
+    with open(os.path.join(store_dir, "features.f64"), "wb") as features_file, \
+            open(os.path.join(store_dir, "hosts.bin"), "wb") as hosts_file:
+        for chunk in pd.read_csv(csv_path, chunksize=chunk_rows, low_memory=False):
+            chunk = clean_flows(chunk, keep_hosts=True)
+
+            features_file.write(np.ascontiguousarray(chunk[feature_names].to_numpy(np.float64)).tobytes())
+            labels.append((chunk["Label"] != "BENIGN").to_numpy(np.int8))
+
+            if has_hosts is None:
+                has_hosts = set(HOST_COLUMNS) <= set(chunk.columns)
+            if has_hosts:
+                hosts_file.write(chunk[HOST_COLUMNS].to_numpy().astype(str).astype(HOST_DTYPE).tobytes())
+            n_rows += len(chunk)
+
+    labels = np.concatenate(labels) if labels else np.zeros(0, dtype=np.int8)
+    np.save(os.path.join(store_dir, "labels.npy"), labels)
+
+    # Same stratified split as split_dataset, so the test rows (and their order) match
+    _, test_rows = train_test_split(
+        np.arange(n_rows), test_size=0.3, random_state=42, stratify=labels
+    )
+    np.save(os.path.join(store_dir, "test_rows.npy"), test_rows)
+
+    if not has_hosts:
+        os.remove(os.path.join(store_dir, "hosts.bin"))
+
+    meta = {**_source_signature(csv_path, feature_names), "rows": n_rows, "hosts": bool(has_hosts)}
+    with open(os.path.join(store_dir, "meta.json"), "w") as handle:
+        json.dump(meta, handle, indent=2)
+    return meta
+
+
+class _RowFile:
+
+    def __init__(self, path, dtype, n_columns, n_rows, block_rows, cache_blocks):
+        self.fd = os.open(path, os.O_RDONLY)
+        self.dtype = np.dtype(dtype)
+        self.n_columns = n_columns
+        self.n_rows = n_rows
+        self.row_bytes = self.dtype.itemsize * n_columns
+        self.block_rows = block_rows
+        self.cache_blocks = cache_blocks
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __del__(self):
+        self.close()
+
+    def _read_block(self, block):
+        start = block * self.block_rows
+        count = min(self.block_rows, self.n_rows - start)
+        data = os.pread(self.fd, count * self.row_bytes, start * self.row_bytes)
+        return np.frombuffer(data, dtype=self.dtype).reshape(count, self.n_columns)
+
+    def _block(self, block):
+        with self._lock:
+            cached = self.cache.get(block)
+            if cached is not None:
+                self.cache.move_to_end(block)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        data = self._read_block(block)
+        with self._lock:
+            self.cache[block] = data
+            while len(self.cache) > self.cache_blocks:
+                self.cache.popitem(last=False)
+        return data
+
+    def take(self, rows):
+        rows = np.asarray(rows, dtype=np.int64)
+        out = np.empty((len(rows), self.n_columns), dtype=self.dtype)
+        blocks, offsets = np.divmod(rows, self.block_rows)
+        # Each block is read once per request, along with its neighbouring rows
+        for block in np.unique(blocks):
+            selected = blocks == block
+            out[selected] = self._block(int(block))[offsets[selected]]
+        return out
+
+
+class _ILoc:
+
+    def __init__(self, frame):
+        self.frame = frame
+
+    def __getitem__(self, positions):
+        if np.isscalar(positions):
+            return self.frame.take([positions]).iloc[0]
+        return self.frame.take(positions)
+
+
+class LazyFrame:
+
+    def __init__(self, row_file, columns, positions, decode=False):
+        self.row_file = row_file
+        self.columns = pd.Index(columns)
+        self.positions = positions
+        self.decode = decode
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def shape(self):
+        return len(self.positions), len(self.columns)
+
+    @property
+    def iloc(self):
+        return _ILoc(self)
+
+    def take(self, positions):
+        positions = np.asarray(positions, dtype=np.int64)
+        values = self.row_file.take(self.positions[positions])
+        if self.decode:
+            values = values.astype(str).astype(object)
+        return pd.DataFrame(values, columns=self.columns, index=positions)
+
+
+class FlowStore:
+
+    def __init__(self, store_dir, block_rows=32, cache_blocks=512):
+        with open(os.path.join(store_dir, "meta.json")) as handle:
+            self.meta = json.load(handle)
+        self.store_dir = store_dir
+        self.feature_names = self.meta["feature_names"]
+        n_rows = self.meta["rows"]
+
+        self.test_rows = np.load(os.path.join(store_dir, "test_rows.npy"), mmap_mode="r")
+        labels = np.load(os.path.join(store_dir, "labels.npy"), mmap_mode="r")
+        self.y_test = pd.Series(labels[self.test_rows], name="Label")
+
+        self.features = _RowFile(
+            os.path.join(store_dir, "features.f64"), np.float64,
+            len(self.feature_names), n_rows, block_rows, cache_blocks
+        )
+        self.X_test = LazyFrame(self.features, self.feature_names, self.test_rows)
+
+        self.hosts = None
+        if self.meta["hosts"]:
+            host_file = _RowFile(
+                os.path.join(store_dir, "hosts.bin"), HOST_DTYPE,
+                len(HOST_COLUMNS), n_rows, block_rows, cache_blocks
+            )
+            self.hosts = LazyFrame(host_file, HOST_COLUMNS, self.test_rows, decode=True)
+
+    def close(self):
+        self.features.close()
+        if self.hosts is not None:
+            self.hosts.row_file.close()
+
+    def cache_stats(self):
+        file = self.features
+        lookups = file.hits + file.misses
+        return {
+            "cached_blocks": len(file.cache),
+            "cache_bytes": len(file.cache) * file.block_rows * file.row_bytes,
+            "hit_ratio": round(file.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def _is_fresh(store_dir, csv_path, feature_names):
+    try:
+        with open(os.path.join(store_dir, "meta.json")) as handle:
+            meta = json.load(handle)
+    except (FileNotFoundError, ValueError):
+        return False
+    signature = _source_signature(csv_path, feature_names)
+    return all(meta.get(key) == value for key, value in signature.items())
+
+
+def _replace_store(staging, target):
+    # Readers of the old store keep their open descriptors; the files are
+    # unlinked only after the new store has been renamed into place
+    retired = None
+    if os.path.exists(target):
+        retired = os.path.join(os.path.dirname(target), f".retired-{uuid.uuid4().hex}")
+        os.rename(target, retired)
+    os.rename(staging, target)
+    if retired is not None:
+        shutil.rmtree(retired, ignore_errors=True)
+
+
+@profiled("open_flow_store")
+def open_flow_store(csv_path, store_dir, feature_names, **cache_options):
+    # One store per feature schema, so switching model versions does not
+    # rebuild (or overwrite) the store another schema is reading
+    target = os.path.join(store_dir, schema_id(list(feature_names)).hex())
+    if not _is_fresh(target, csv_path, feature_names):
+        os.makedirs(store_dir, exist_ok=True)
+        staging = os.path.join(store_dir, f".staging-{uuid.uuid4().hex}")
+        try:
+            build_flow_store(csv_path, staging, feature_names)
+            _replace_store(staging, target)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+    return FlowStore(target, **cache_options)
@@ -0,0 +1,127 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+from scipy.stats import rankdata
+
+
+def _nearest_correlation(corr):
+    # Clip negative eigenvalues so the Cholesky factor always exists
+    corr = np.nan_to_num(corr, nan=0.0)
+    np.fill_diagonal(corr, 1.0)
+    eigvals, eigvecs = np.linalg.eigh(corr)
+    corr = (eigvecs * np.clip(eigvals, 1e-6, None)) @ eigvecs.T
+    scale = np.sqrt(np.diag(corr))
+    corr = corr / np.outer(scale, scale)
+    return np.linalg.cholesky(corr)
+
+
+Z_LIMIT = 5.0
+
+
+def _fit_class(X, quantile_points):
+    # Marginal quantiles tabulated on a uniform grid of normal scores, so
+    # sampling maps z straight to a grid position without evaluating the CDF
+    levels = ndtr(np.linspace(-Z_LIMIT, Z_LIMIT, quantile_points))
+    levels[0], levels[-1] = 0.0, 1.0
+    quantiles = np.quantile(X, levels, axis=0)
+    # Gaussian copula: correlations between normal scores of the ranks
+    scores = ndtri(rankdata(X, axis=0) / (len(X) + 1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = np.corrcoef(scores, rowvar=False)
+    return {
+        "quantiles": np.ascontiguousarray(quantiles.T),
+        "cholesky": _nearest_correlation(np.atleast_2d(corr)).T,
+        "integer": np.all(X == np.round(X), axis=0),
+    }
+
+
+class SyntheticFlowGenerator:
+
+    def __init__(self, feature_names, class_models, attack_ratio, seed=None):
+        self.feature_names = list(feature_names)
+        self.class_models = class_models
+        self.attack_ratio = attack_ratio
+        self.rng = np.random.default_rng(seed)
+
+    @classmethod
+    def fit(cls, df, feature_names, quantile_points=257, max_rows=200000, seed=None):
+        rng = np.random.default_rng(seed)
+        y = (df["Label"] != "BENIGN").to_numpy()
+        X = df[feature_names].to_numpy(dtype=np.float64)
+
+        class_models = {}
+        for label in (0, 1):
+            rows = np.flatnonzero(y == label)
+            if len(rows) == 0:
+                continue
+            if len(rows) > max_rows:
+                rows = rng.choice(rows, max_rows, replace=False)
+            class_models[label] = _fit_class(X[rows], quantile_points)
+
+        return cls(feature_names, class_models, float(y.mean()), seed)
+
+    def _sample_class(self, label, count, dtype):
+        params = self.class_models[label]
+        quantiles = params["quantiles"].astype(dtype, copy=False)
+        n_features, grid_points = quantiles.shape
+        z = self.rng.standard_normal((count, n_features), dtype=np.float32)
+        z = z @ params["cholesky"].astype(np.float32)
+
+        # Inverse marginal CDF by linear interpolation over the quantile grid
+        z += Z_LIMIT
+        z *= (grid_points - 1) / (2 * Z_LIMIT)
+        np.clip(z, 0, grid_points - 1, out=z)
+        lower = np.minimum(z.astype(np.intp), grid_points - 2)
+        z -= lower
+        lower += np.arange(n_features) * grid_points
+        flat = quantiles.ravel()
+        values = flat.take(lower)
+        values += z * (flat.take(lower + 1) - values)
+
+        integer = params["integer"]
+        if integer.any():
+            values[:, integer] = np.round(values[:, integer])
+        return values
+
+    def sample(self, count, attack_ratio=None, dtype=np.float32):
+        if attack_ratio is None:
+            attack_ratio = self.attack_ratio
+        if 1 not in self.class_models:
+            attack_ratio = 0.0
+        elif 0 not in self.class_models:
+            attack_ratio = 1.0
+
+        labels = (self.rng.random(count) < attack_ratio).astype(np.int8)
+        X = np.empty((count, len(self.feature_names)), dtype=dtype)
+        for label in (0, 1):
+            rows = labels == label
+            n_rows = int(rows.sum())
+            if n_rows:
+                X[rows] = self._sample_class(label, n_rows, dtype)
+
+        return pd.DataFrame(X, columns=self.feature_names, copy=False), labels
+
+    def stream(self, n_flows, batch_size=100000, attack_ratio=None, dtype=np.float32):
+        remaining = int(n_flows)
+        while remaining > 0:
+            count = min(batch_size, remaining)
+            yield self.sample(count, attack_ratio, dtype)
+            remaining -= count
+
+
+def load_generator(path, seed=None):
+    if not os.path.exists(path):
+        return None
+    generator = joblib.load(path)
+    # The saved random state is not reused, so each run can pick its own seed
+    generator.rng = np.random.default_rng(seed)
+    return generator
+
+
+def save_generator(generator, path):
+    tmp_path = f"{path}.tmp"
+    joblib.dump(generator, tmp_path)
+    os.replace(tmp_path, path)
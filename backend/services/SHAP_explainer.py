@@ -1,20 +1,39 @@
 import shap
+from functools import lru_cache
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+from backend.core.profiling import profiled, stage
 
 
+class BinnedExplainer:
+
+    def __init__(self, model):
+        self.model = model
+        self.explainer = shap.TreeExplainer(model.estimator)
+
+    def __call__(self, X):
+        return self.explainer(self.model.transform(X))
+
+
+@profiled("create_explainer")
 def create_explainer(model):
+    # Cascades are explained through the full forest that settles uncertain flows
+    model = getattr(model, "full_model", model)
+    if hasattr(model, "binner"):
+        return BinnedExplainer(model)
     return shap.TreeExplainer(model)
 
-def generate_shap_analysis(explainer, packet_df, feature_names, prediction):
+def attack_shap_values(explainer, X):
+    values = explainer(X).values
+    # Tree explainers on classifiers return one slice per class
+    return values[:, :, 1] if values.ndim == 3 else values
 
-    shap_output = explainer(packet_df)
+@profiled("shap_analysis")
+def generate_shap_analysis(explainer, packet_df, feature_names, prediction):
 
-    if len(shap_output.values.shape) == 3:
-        shap_vector = shap_output.values[0, :, 1]
-    else:
-        shap_vector = shap_output.values[0]
+    with stage("shap_values"):
+        shap_vector = attack_shap_values(explainer, packet_df)[0]
 
     # Prepare impact dataframe
     impact_df = pd.DataFrame({
@@ -28,54 +47,65 @@ def generate_shap_analysis(explainer, packet_df, feature_names, prediction):
 
     top_impacts = impact_df.head(5)
 
-    explanation_text = build_explanation_text(top_impacts, prediction)
+    explanation_text = build_explanation_text(top_impacts, prediction, _cached_category_map(tuple(feature_names)))
 
     return shap_vector, explanation_text
 
 
-def build_explanation_text(top_impacts, prediction):
+def categorize_feature(feature_name):
+    if "Packets" in feature_name or "Bytes" in feature_name:
+        return "Traffic Volume"
+    elif "Length" in feature_name or "Segment" in feature_name:
+        return "Packet Size Characteristics"
+    elif "IAT" in feature_name:
+        return "Timing Behavior"
+    elif "Flag" in feature_name:
+        return "Protocol Flags"
+    elif "Win" in feature_name:
+        return "TCP Window Behavior"
+    else:
+        return "General Network Behavior"
+
+
+def category_map(feature_names):
+    return {name: categorize_feature(name) for name in feature_names}
+
+
+@lru_cache(maxsize=8)
+def _cached_category_map(feature_names):
+    # One map per feature schema instead of substring checks on every explanation
+    return category_map(feature_names)
+
 
-    def categorize_feature(feature_name):
-        if "Packets" in feature_name or "Bytes" in feature_name:
-            return "Traffic Volume"
-        elif "Length" in feature_name or "Segment" in feature_name:
-            return "Packet Size Characteristics"
-        elif "IAT" in feature_name:
-            return "Timing Behavior"
-        elif "Flag" in feature_name:
-            return "Protocol Flags"
-        elif "Win" in feature_name:
-            return "TCP Window Behavior"
-        else:
-            return "General Network Behavior"
+def build_explanation_text(top_impacts, prediction, categories=None):
 
     prediction_label = "ATTACK" if prediction == 1 else "BENIGN"
 
     grouped_reasons = {}
 
-    for _, row in top_impacts.iterrows():
-        category = categorize_feature(row["Feature"])
-        grouped_reasons.setdefault(category, []).append(row)
+    for feature, impact, value in zip(top_impacts["Feature"], top_impacts["Impact"], top_impacts["Actual Value"]):
+        category = categories[feature] if categories else categorize_feature(feature)
+        grouped_reasons.setdefault(category, []).append((feature, impact, value))
 
-    explanation_text = (
+    lines = [
         f"The model classified this packet as {prediction_label} "
         f"based on the following behavioral indicators:\n\n"
-    )
+    ]
 
     for category, rows in grouped_reasons.items():
-        explanation_text += f"**{category}:**\n"
-        for row in rows:
-            direction = "increased" if row["Impact"] > 0 else "decreased"
-            explanation_text += (
-                f"• {row['Feature']} = {row['Actual Value']} "
+        lines.append(f"**{category}:**\n")
+        for feature, impact, value in rows:
+            direction = "increased" if impact > 0 else "decreased"
+            lines.append(
+                f"• {feature} = {value} "
                 f"{direction} attack probability "
-                f"(impact score: {row['Impact']:.4f})\n"
+                f"(impact score: {impact:.4f})\n"
             )
-        explanation_text += "\n"
+        lines.append("\n")
 
     if prediction == 1:
-        explanation_text += "Overall, these patterns led to attack classification."
+        lines.append("Overall, these patterns led to attack classification.")
     else:
-        explanation_text += "Overall, these patterns led to benign classification."
+        lines.append("Overall, these patterns led to benign classification.")
 
-    return explanation_text
\ No newline at end of file
+    return "".join(lines)
@@ -0,0 +1,180 @@
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+import types
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+
+from backend.core import profiling
+from backend.services.SHAP_explainer import attack_shap_values, create_explainer, generate_shap_analysis
+
+# Never fork: the dashboard process is multithreaded, and a forked child can
+# inherit a lock (profiling, the flow store cache) that another thread holds
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_worker_explainer = None
+
+
+@contextmanager
+def _without_main():
+    # Streamlit executes the app as a synthetic __main__ module; a child
+    # started while it is visible would re-run the whole dashboard on start-up
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main
+
+
+def _init_worker(model, profile, track_memory):
+    global _worker_explainer
+    if profile:
+        profiling.enable(track_memory)
+        profiling.forward_records()
+    _worker_explainer = create_explainer(model)
+
+
+def _worker_ready():
+    return profiling.drain_forwarded()
+
+
+def _run_in_worker(task, *args):
+    # Stage timings travel back with the result and are recorded by the parent
+    result = task(_worker_explainer, *args)
+    return result, profiling.drain_forwarded()
+
+
+def _record_all(records):
+    for name, seconds, memory_delta in records:
+        profiling.record(name, seconds, memory_delta)
+
+
+def _unwrap(worker_future, future):
+    if worker_future.cancelled():
+        future.set_exception(CancelledError())
+    elif worker_future.exception() is not None:
+        future.set_exception(worker_future.exception())
+    else:
+        result, records = worker_future.result()
+        _record_all(records)
+        future.set_result(result)
+
+
+class ExplainerPool:
+
+    def __init__(self, model, size=None, processes=None, lease_timeout=10.0):
+        self.size = size or os.cpu_count() or 1
+        self.processes = self.size > 1 if processes is None else processes
+        self.lease_timeout = lease_timeout
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+
+        # Tree SHAP holds the GIL, so by default each explainer lives in its
+        # own worker process and the queue only hands out worker slots
+        if self.processes:
+            self._executor = ProcessPoolExecutor(
+                self.size,
+                mp_context=multiprocessing.get_context(START_METHOD),
+                initializer=_init_worker,
+                initargs=(model, profiling.is_enabled(), profiling.is_tracking_memory())
+            )
+            # Start every worker (and build its explainer) now rather than on first
+            # request; with all of them running the executor never starts another
+            with _without_main():
+                warmups = [self._executor.submit(_worker_ready) for _ in range(self.size)]
+            for ready in warmups:
+                _record_all(ready.result())
+            for slot in range(self.size):
+                self._idle.put(slot)
+        else:
+            self._executor = ThreadPoolExecutor(self.size, thread_name_prefix="explainer")
+            for _ in range(self.size):
+                self._idle.put(create_explainer(model))
+
+        self.busy = 0
+        self.leases = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.busy_seconds = 0.0
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def lease(self, timeout=None):
+        timeout = self.lease_timeout if timeout is None else timeout
+        start = time.perf_counter()
+        try:
+            explainer = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            with self._lock:
+                self.timeouts += 1
+            raise TimeoutError(f"No explainer became free within {timeout}s")
+
+        leased = time.perf_counter()
+        with self._lock:
+            self.busy += 1
+            self.leases += 1
+            self.wait_seconds += leased - start
+            self.max_wait_seconds = max(self.max_wait_seconds, leased - start)
+        try:
+            yield explainer
+        finally:
+            with self._lock:
+                self.busy -= 1
+                self.busy_seconds += time.perf_counter() - leased
+            self._idle.put(explainer)
+
+    def _run_leased(self, task, args, timeout):
+        with self.lease(timeout) as explainer:
+            return task(explainer, *args)
+
+    def submit(self, task, *args, timeout=None):
+        # task(explainer, *args) runs with a leased explainer; in process mode it
+        # must be a module-level function so it can be sent to the worker
+        if not self.processes:
+            return self._executor.submit(self._run_leased, task, args, timeout)
+
+        # Block the caller (not the workers) until a process is free, so the
+        # executor never queues more work than there are explainers
+        lease = self.lease(timeout)
+        lease.__enter__()
+        try:
+            worker_future = self._executor.submit(_run_in_worker, task, *args)
+        except BaseException:
+            lease.__exit__(None, None, None)
+            raise
+        future = Future()
+        future.set_running_or_notify_cancel()
+
+        def done(worker_future):
+            lease.__exit__(None, None, None)
+            _unwrap(worker_future, future)
+
+        worker_future.add_done_callback(done)
+        return future
+
+    def explain(self, packet_df, feature_names, prediction, timeout=None):
+        return self.submit(generate_shap_analysis, packet_df, feature_names, prediction, timeout=timeout)
+
+    def shap_values(self, X, timeout=None):
+        return self.submit(attack_shap_values, X, timeout=timeout)
+
+    def stats(self):
+        with self._lock:
+            elapsed = time.perf_counter() - self.started
+            return {
+                "size": self.size,
+                "busy": self.busy,
+                "utilization": round(self.busy_seconds / (elapsed * self.size), 4) if elapsed else 0.0,
+                "leases": self.leases,
+                "timeouts": self.timeouts,
+                "mean_wait_ms": round(1000 * self.wait_seconds / self.leases, 3) if self.leases else 0.0,
+                "max_wait_ms": round(1000 * self.max_wait_seconds, 3),
+            }
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
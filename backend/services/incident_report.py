@@ -0,0 +1,155 @@
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from backend.core.profiling import profiled
+from backend.services.SHAP_explainer import attack_shap_values, category_map
+from backend.services.explainer_pool import ExplainerPool
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "templates")
+
+_environment = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(["html"]),
+    trim_blocks=True,
+    lstrip_blocks=True,
+)
+
+
+def _batched_shap(explainer, X, chunk_rows):
+    # An explainer pool spreads the chunks over its workers; a bare explainer
+    # takes the whole batch in one call
+    if not isinstance(explainer, ExplainerPool):
+        return attack_shap_values(explainer, X)
+    futures = [explainer.shap_values(X.iloc[start:start + chunk_rows]) for start in range(0, len(X), chunk_rows)]
+    return np.vstack([future.result() for future in futures])
+
+
+class IncidentReporter:
+
+    def __init__(self, explainer, feature_names, out_dir, min_probability=0.5, top_k=5,
+                 max_flows=500, chunk_rows=32, alerts_only=True, max_pending=4):
+        self.explainer = explainer
+        self.feature_names = list(feature_names)
+        self.out_dir = out_dir
+        self.min_probability = min_probability
+        self.top_k = top_k
+        self.max_flows = max_flows
+        self.chunk_rows = chunk_rows
+        self.alerts_only = alerts_only
+
+        # Built once from the schema instead of re-running substring checks per row
+        categories = category_map(self.feature_names)
+        self.category_names = list(dict.fromkeys(categories.values()))
+        self.feature_category = np.array([self.category_names.index(categories[f]) for f in self.feature_names])
+        self.category_onehot = np.eye(len(self.category_names))[self.feature_category]
+
+        self.reports_written = 0
+        self.skipped_windows = 0
+        self.last_error = None
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="incident-report")
+
+    def consume(self, X_window, probabilities, event):
+        if self.alerts_only and not event.get("alert_triggered"):
+            return
+        # Report generation runs in the background; bursts beyond the backlog are skipped
+        if not self._pending.acquire(blocking=False):
+            self.skipped_windows += 1
+            return
+        future = self._executor.submit(self.write_bundle, X_window, probabilities, dict(event))
+        future.add_done_callback(self._finished)
+
+    def _finished(self, future):
+        self._pending.release()
+        if future.exception() is not None:
+            logger.error("Incident report failed", exc_info=future.exception())
+            self.last_error = future.exception()
+
+    def _flows(self, X_flows, probabilities, shap_values):
+        values = X_flows.to_numpy()
+        top = np.argsort(-np.abs(shap_values), axis=1)[:, :self.top_k]
+
+        flows = []
+        for i, ref in enumerate(X_flows.index):
+            grouped = {}
+            for j in top[i]:
+                impact = float(shap_values[i, j])
+                grouped.setdefault(self.category_names[self.feature_category[j]], []).append({
+                    "feature": self.feature_names[j],
+                    "value": values[i, j].item(),
+                    "impact": impact,
+                    "direction": "increased" if impact > 0 else "decreased",
+                })
+            probability = float(probabilities[i])
+            flows.append({
+                "ref": ref.item() if hasattr(ref, "item") else ref,
+                "probability": probability,
+                "label": "ATTACK" if probability > 0.5 else "BENIGN",
+                "drivers": [{"category": category, "items": items} for category, items in grouped.items()],
+            })
+        return flows
+
+    @profiled("incident_report")
+    def build_incident(self, X_window, probabilities, event):
+        probabilities = np.asarray(probabilities)
+        selected = np.flatnonzero(probabilities >= self.min_probability)
+        selected = selected[np.argsort(-probabilities[selected])][:self.max_flows]
+        X_flows = X_window.iloc[selected][self.feature_names]
+
+        shap_values = (
+            _batched_shap(self.explainer, X_flows, self.chunk_rows)
+            if len(X_flows) else np.zeros((0, len(self.feature_names)))
+        )
+
+        # Window-level view: total absolute impact per behavioural category
+        totals = np.abs(shap_values).sum(axis=0) @ self.category_onehot
+        grand_total = totals.sum()
+        categories = [
+            {
+                "category": self.category_names[c],
+                "total_impact": float(totals[c]),
+                "share": float(totals[c] / grand_total) if grand_total > 0 else 0.0,
+            }
+            for c in np.argsort(-totals)
+        ]
+
+        return {
+            "window_id": event.get("window_id") or datetime.now().strftime("%Y%m%d-%H%M%S-%f"),
+            "timestamp": event.get("timestamp"),
+            "generated": datetime.now().isoformat(timespec="seconds"),
+            "severity": event.get("severity"),
+            "mean_risk_score": float(event.get("mean_risk_score", float(np.mean(probabilities)))),
+            "attack_count": int(event.get("attack_count", int(np.sum(probabilities > 0.5)))),
+            "window_size": int(event.get("window_size", len(probabilities))),
+            "categories": categories,
+            "flows": self._flows(X_flows, probabilities[selected], shap_values),
+        }
+
+    def write_bundle(self, X_window, probabilities, event):
+        incident = self.build_incident(X_window, probabilities, event)
+        bundle_dir = os.path.join(self.out_dir, f"incident-{incident['window_id']}")
+        os.makedirs(bundle_dir, exist_ok=True)
+
+        paths = {
+            "json": os.path.join(bundle_dir, "incident.json"),
+            "markdown": os.path.join(bundle_dir, "incident.md"),
+            "html": os.path.join(bundle_dir, "incident.html"),
+        }
+        with open(paths["json"], "w") as handle:
+            json.dump({"event": event, **incident}, handle, indent=2, default=str)
+        with open(paths["markdown"], "w") as handle:
+            handle.write(_environment.get_template("incident.md.j2").render(incident=incident))
+        with open(paths["html"], "w") as handle:
+            handle.write(_environment.get_template("incident.html.j2").render(incident=incident))
+
+        self.reports_written += 1
+        return paths
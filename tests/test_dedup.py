@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from backend.core import dedup
+from backend.core.dedup import dedup_predict, dedup_predict_proba, duplicate_report
+
+
+@pytest.fixture(scope="module")
+def flows():
+    rng = np.random.default_rng(0)
+    # Integer-valued counters, like the CICIDS features, so duplicates are common
+    X = pd.DataFrame(rng.integers(0, 4, size=(600, 6)).astype(np.float64),
+                     columns=[f"f{j}" for j in range(6)])
+    y = (X["f0"] + X["f1"] > 3).astype(int)
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    return model, X
+
+
+def test_duplicated_rows_score_exactly_like_predict_proba(flows):
+    model, X = flows
+    rows = np.random.default_rng(1).integers(0, len(X), 3 * len(X))
+    X_case = X.iloc[rows]
+    np.testing.assert_array_equal(dedup_predict_proba(model, X_case), model.predict_proba(X_case))
+
+
+@pytest.mark.filterwarnings("ignore:X does not have valid feature names")
+def test_float32_batches_score_exactly_like_predict_proba(flows):
+    model, X = flows
+    values = X.to_numpy(np.float32)
+    np.testing.assert_array_equal(dedup_predict_proba(model, values), model.predict_proba(values))
+
+
+def test_single_and_empty_inputs(flows):
+    model, X = flows
+    np.testing.assert_array_equal(dedup_predict_proba(model, X.iloc[:1]), model.predict_proba(X.iloc[:1]))
+    assert dedup_predict_proba(model, X.iloc[:0]).shape == (0, 2)
+
+
+def test_key_collisions_fall_back_to_exact_scoring(flows, monkeypatch):
+    model, X = flows
+    # A zero projection gives every row the same key
+    monkeypatch.setitem(dedup._projections, X.shape[1], np.zeros((X.shape[1], 2)))
+    np.testing.assert_array_equal(dedup_predict_proba(model, X), model.predict_proba(X))
+    np.testing.assert_array_equal(dedup_predict(model, X), model.predict(X))
+
+
+def test_duplicate_report(flows):
+    _, X = flows
+    report = duplicate_report(pd.concat([X, X]))
+    assert report["rows"] == 2 * len(X)
+    assert report["unique_rows"] == len(X.drop_duplicates())
+    assert report["max_multiplicity"] >= 2
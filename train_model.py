@@ -2,64 +2,186 @@ import pandas as pd
 import numpy as np
 import joblib
 import os
+import argparse
+import time
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report
+from backend.core.binning import train_binned_model
+from backend.core.cascade import train_cascade
+from backend.core.evaluation import benchmark_model, cascade_report, evaluate
+from backend.core.dedup import dedup_predict, duplicate_report
+from backend.core.drift import reference_statistics
+from backend.core.registry import ModelRegistry
+from backend.core.search import search_forest, select_configuration
+from backend.core.synthetic import SyntheticFlowGenerator
 
 DATA_FILE = "Friday-WorkingHours-Afternoon-DDos.pcap_ISCX.csv"
 
 MODEL_DIR = "model"
 MODEL_FILE = os.path.join(MODEL_DIR, "rf_model.pkl")
 FEATURE_FILE = os.path.join(MODEL_DIR, "rf_features.pkl")
-
-os.makedirs(MODEL_DIR, exist_ok=True)
-
-print("Loading dataset...")
-df = pd.read_csv(DATA_FILE)
-
-df.columns = df.columns.str.strip()
-df.replace([np.inf, -np.inf], np.nan, inplace=True)
-df.dropna(inplace=True)
-
-columns_to_drop = [
-    "Flow ID",
-    "Source IP",
-    "Destination IP",
-    "Timestamp"
-]
-
-for col in columns_to_drop:
-    if col in df.columns:
-        df.drop(col, axis=1, inplace=True)
-
-if "Label" not in df.columns:
-    raise ValueError("Label column not found.")
-
-X = df.drop("Label", axis=1)
-y = df["Label"].apply(lambda x: 0 if x == "BENIGN" else 1)
-
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.3, random_state=42, stratify=y
-)
-
-print("Training RandomForest...")
-
-model = RandomForestClassifier(
-    n_estimators=100,
-    random_state=42,
-    n_jobs=-1
-)
-
-model.fit(X_train, y_train)
-
-print("\nModel Evaluation:")
-print(classification_report(y_test, model.predict(X_test)))
-
-joblib.dump(model, MODEL_FILE)
-joblib.dump(X.columns.tolist(), FEATURE_FILE)
-
-print("\nModel and feature schema saved in /model directory.")
-
-print("\nTop Feature Importances:")
-for name, importance in zip(X.columns, model.feature_importances_):
-    print(f"{name}: {importance:.4f}")
\ No newline at end of file
+CASCADE_FILE = os.path.join(MODEL_DIR, "rf_cascade.pkl")
+BINNED_FILE = os.path.join(MODEL_DIR, "hgb_model.pkl")
+SEARCH_FILE = os.path.join(MODEL_DIR, "rf_search.csv")
+REGISTRY_DIR = os.path.join(MODEL_DIR, "registry")
+DRIFT_FILE = os.path.join(MODEL_DIR, "rf_drift.pkl")
+SYNTHETIC_FILE = os.path.join(MODEL_DIR, "rf_synthetic.pkl")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the intrusion detection model.")
+    parser.add_argument("--cascade", action="store_true",
+                        help="also train a two-stage cascade that short-circuits confident flows")
+    parser.add_argument("--binned", action="store_true",
+                        help="also train a uint8-binned HistGradientBoosting model and benchmark it")
+    parser.add_argument("--search", action="store_true",
+                        help="search forest configurations for the best accuracy / inference cost trade-off")
+    parser.add_argument("--budget", type=float, default=600.0,
+                        help="time budget for --search in seconds (default: 600)")
+    parser.add_argument("--candidates", type=int, default=24,
+                        help="number of configurations sampled by --search (default: 24)")
+    parser.add_argument("--publish", action="store_true",
+                        help="publish the trained model as a new active version in the model registry")
+    args = parser.parse_args()
+
+    os.makedirs(MODEL_DIR, exist_ok=True)
+
+    print("Loading dataset...")
+    df = pd.read_csv(DATA_FILE)
+
+    df.columns = df.columns.str.strip()
+    df.replace([np.inf, -np.inf], np.nan, inplace=True)
+    df.dropna(inplace=True)
+
+    columns_to_drop = [
+        "Flow ID",
+        "Source IP",
+        "Destination IP",
+        "Timestamp"
+    ]
+
+    for col in columns_to_drop:
+        if col in df.columns:
+            df.drop(col, axis=1, inplace=True)
+
+    if "Label" not in df.columns:
+        raise ValueError("Label column not found.")
+
+    X = df.drop("Label", axis=1)
+    y = df["Label"].apply(lambda x: 0 if x == "BENIGN" else 1)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.3, random_state=42, stratify=y
+    )
+
+    forest_params = {"n_estimators": 100}
+
+    if args.search:
+        print(f"Searching {args.candidates} forest configurations (budget {args.budget:.0f}s)...")
+        results = search_forest(X_train, y_train, n_candidates=args.candidates, time_budget=args.budget)
+        if results:
+            pd.DataFrame(results).to_csv(SEARCH_FILE, index=False)
+
+            print(f"{'Trees':>6}{'Depth':>7}{'Features':>10}{'Leaf':>6}{'ROC-AUC':>10}{'us/flow':>10}{'Model MB':>10}")
+            for result in results:
+                if result["pareto"]:
+                    print(f"{result['n_estimators']:>6}{str(result['max_depth']):>7}{str(result['max_features']):>10}"
+                          f"{result['min_samples_leaf']:>6}{result['roc_auc']:>10.4f}{result['latency_us']:>10.2f}"
+                          f"{result['model_bytes'] / 1e6:>10.2f}")
+
+            forest_params = select_configuration(results)
+            print(f"{sum(r['pareto'] for r in results)} of {len(results)} evaluated configurations are Pareto-optimal; "
+                  f"chosen: {forest_params}")
+        else:
+            print("No configuration finished within the budget; keeping the default forest.")
+
+    print("\nTraining RandomForest...")
+    train_start = time.perf_counter()
+
+    model = RandomForestClassifier(
+        **forest_params,
+        random_state=42,
+        n_jobs=-1
+    )
+
+    model.fit(X_train, y_train)
+    rf_train_seconds = time.perf_counter() - train_start
+
+    print("\nModel Evaluation:")
+    print(classification_report(y_test, dedup_predict(model, X_test)))
+
+    duplicates = duplicate_report(X)
+    print(f"Duplicate flows: {duplicates['duplicate_ratio']:.1%} of {duplicates['rows']} rows "
+          f"({duplicates['unique_rows']} unique, max multiplicity {duplicates['max_multiplicity']})")
+
+    joblib.dump(model, MODEL_FILE)
+    joblib.dump(X.columns.tolist(), FEATURE_FILE)
+    joblib.dump(reference_statistics(X_train), DRIFT_FILE)
+    # Replay and benchmark traffic for backend.core.sharding
+    joblib.dump(SyntheticFlowGenerator.fit(df.loc[X_train.index], X.columns.tolist(), seed=42), SYNTHETIC_FILE)
+
+    print("\nModel, feature schema, drift reference and flow generator saved in /model directory.")
+
+    print("\nTop Feature Importances:")
+    for name, importance in zip(X.columns, model.feature_importances_):
+        print(f"{name}: {importance:.4f}")
+
+    if args.cascade:
+        print("\nTraining cascade first stage...")
+
+        X_fit, X_val, y_fit, y_val = train_test_split(
+            X_train, y_train, test_size=0.2, random_state=42, stratify=y_train
+        )
+        cascade = train_cascade(model, X_fit, y_fit, X_val)
+        report = cascade_report(cascade, X_test, y_test)
+
+        print(f"Uncertainty band: {report['band'][0]:.2f} - {report['band'][1]:.2f}")
+        print(f"Flows short-circuited: {report['short_circuit_ratio']:.1%}")
+        print(f"Throughput: {report['full_flows_per_sec']:.0f} -> {report['cascade_flows_per_sec']:.0f} flows/s "
+              f"({report['speedup']:.2f}x)")
+        print(f"Accuracy: {report['full_accuracy']:.4f} -> {report['cascade_accuracy']:.4f} "
+              f"(lost {report['accuracy_lost']:.4f})")
+        print(f"ROC-AUC: {report['full_roc_auc']:.4f} -> {report['cascade_roc_auc']:.4f}")
+
+        joblib.dump(cascade, CASCADE_FILE)
+        print("Cascade saved in /model directory.")
+
+    if args.binned:
+        print("\nTraining binned HistGradientBoosting...")
+
+        train_start = time.perf_counter()
+        binned_model, binned_store = train_binned_model(X_train, y_train)
+        binned_train_seconds = time.perf_counter() - train_start
+
+        results = {
+            "RandomForest": benchmark_model(model, X_test, y_test, X_train, rf_train_seconds),
+            "Binned HGB": benchmark_model(binned_model, X_test, y_test, binned_store, binned_train_seconds),
+        }
+
+        print(f"{'Engine':<14}{'Model MB':>10}{'Bytes/flow':>12}{'Train s':>10}{'Flows/s':>12}{'ROC-AUC':>10}")
+        for name, result in results.items():
+            print(f"{name:<14}{result['model_bytes'] / 1e6:>10.2f}{result['bytes_per_flow']:>12.1f}"
+                  f"{result['train_seconds']:>10.2f}{result['flows_per_sec']:>12.0f}{result['roc_auc']:>10.4f}")
+
+        joblib.dump(binned_model, BINNED_FILE)
+        print("Binned model saved in /model directory.")
+
+    if args.publish:
+        registry = ModelRegistry(REGISTRY_DIR)
+        version = registry.publish(
+            model, X.columns.tolist(),
+            cascade=cascade if args.cascade else None,
+            metadata={
+                "roc_auc": round(float(evaluate(model, X_test, y_test)[3]), 4),
+                "params": forest_params,
+                "train_rows": len(X_train),
+                "data_file": DATA_FILE,
+            },
+        )
+        print(f"\nPublished and activated model version {version} in {REGISTRY_DIR}.")
+
+
+if __name__ == "__main__":
+    # --search runs candidates in worker processes, which re-import this module
+    main()